@@ -1,7 +1,7 @@
 import copy
 import textwrap
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from typing import Callable, Optional, Union
 
@@ -12,6 +12,31 @@ from numpy.typing import DTypeLike, NDArray
 from .dxgi_format import DXGIFormat
 
 
+def in_place_converter(converter: Callable) -> Callable:
+    """Marks data converter that modifies the array it receives instead of allocating a new one"""
+    converter.in_place = True
+    return converter
+
+
+def apply_converters(data: NDArray, converters: list[Callable]) -> NDArray:
+    """
+    Runs data through given converters and returns the result, the source array is never modified
+    Converters marked with `in_place_converter` work on a private copy, which is made at most once
+    and only if the data still refers to the source array (or a view of it) by then
+    """
+    owned = False
+    for converter in converters:
+        if not owned and getattr(converter, "in_place", False):
+            data = numpy.array(data)
+            owned = True
+        result = converter(data)
+        # Converter allocated new array, it's ours to modify from now on
+        if not numpy.may_share_memory(result, data):
+            owned = True
+        data = result
+    return data
+
+
 class Semantic(str, Enum):
     VertexId = "VERTEXID"
     Index = "INDEX"
@@ -116,6 +141,13 @@ class BufferLayout:
     semantics: list[BufferSemantic]
     stride: int = 0
     force_stride: bool = False
+    # Lazily built lookups, reset whenever elements are added
+    _numpy_type: Optional[numpy.dtype] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _elements: Optional[dict[AbstractSemantic, BufferSemantic]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def __post_init__(self) -> None:
         # Autofill byte Stride and Offsets
@@ -140,10 +172,11 @@ class BufferLayout:
 
     def get_element(self, abstract: AbstractSemantic) -> Optional[BufferSemantic]:
         """Returns the first element with the same semantic name and index"""
-        for element in self.semantics:
-            if abstract == element.abstract:
-                return element
-        return None
+        if self._elements is None:
+            self._elements = {}
+            for element in self.semantics:
+                self._elements.setdefault(element.abstract, element)
+        return self._elements.get(abstract)
 
     def add_element(self, semantic: BufferSemantic) -> None:
         """Adds a new element to the layout"""
@@ -153,10 +186,13 @@ class BufferLayout:
         semantic.offset = self.stride
         self.semantics.append(semantic)
         self.stride += semantic.stride
+        self._numpy_type = None
+        if self._elements is not None:
+            self._elements[semantic.abstract] = semantic
 
     def merge(self, layout) -> None:
         for semantic in layout.semantics:
-            if not self.get_element(semantic):
+            if not self.get_element(semantic.abstract):
                 self.add_element(semantic)
 
     def to_string(self) -> str:
@@ -167,18 +203,26 @@ class BufferLayout:
         return ret
 
     def get_numpy_type(self) -> DTypeLike:
-        dtype = numpy.dtype([])
-        for semantic in self.semantics:
-            dtype = numpy.dtype(
-                dtype.descr
-                + [(semantic.abstract.get_name(), (semantic.get_numpy_type()))]
+        if self._numpy_type is None:
+            self._numpy_type = numpy.dtype(
+                [
+                    (semantic.abstract.get_name(), semantic.get_numpy_type())
+                    for semantic in self.semantics
+                ]
             )
-        return dtype
+        return self._numpy_type
 
 
 class NumpyBuffer:
     layout: BufferLayout
     data: NDArray
+    # Over-allocated storage backing `data` while it's being grown by `append`
+    _storage: Optional[NDArray] = None
+    _storage_view: Optional[NDArray] = None
+    # Last layout found equal to ours and its dtype at the time, so repeated appends skip the
+    # field by field comparison. add_element() rebuilds the dtype, which invalidates the match
+    _matched_layout: Optional[BufferLayout] = None
+    _matched_numpy_type: Optional[numpy.dtype] = None
 
     def __init__(
         self, layout: BufferLayout, data: Optional[NDArray] = None, size=0
@@ -217,6 +261,26 @@ class NumpyBuffer:
         else:
             self.data = numpy.unique(self.data)
 
+    def deduplicate(self) -> NDArray:
+        """
+        Removes rows with exactly the same bytes, keeping the first occurrence
+        of each in its original order, and returns the index of every original
+        row in the deduplicated data.
+        """
+        # Compare whole rows as opaque fixed-width values, so one sort handles
+        # any layout without going through the structured field comparison
+        data = numpy.ascontiguousarray(self.data)
+        rows = data.view(numpy.dtype((numpy.void, data.dtype.itemsize)))
+        _, unique_index, inverse = numpy.unique(
+            rows, return_index=True, return_inverse=True
+        )
+        inverse = inverse.reshape(-1)
+        order = numpy.argsort(unique_index)
+        remap = numpy.empty_like(order)
+        remap[order] = numpy.arange(len(order))
+        self.data = self.data[unique_index[order]]
+        return remap[inverse]
+
     def import_semantic_data(
         self,
         data: NDArray,
@@ -231,14 +295,11 @@ class NumpyBuffer:
             raise ValueError(
                 f"NumpyBuffer is missing {semantic.abstract} semantic data!"
             )
-        if semantic_converters is not None:
-            for data_converter in semantic_converters:
-                data = data_converter(data)
+        converters = list(semantic_converters or [])
         if current_semantic.format != semantic.format:
-            data = current_semantic.format.type_encoder(data)
-        if format_converters is not None:
-            for data_converter in format_converters:
-                data = data_converter(data)
+            converters.append(current_semantic.format.type_encoder)
+        converters.extend(format_converters or [])
+        data = apply_converters(data, converters)
         self.set_field(current_semantic.get_name(), data)
 
     def import_data(
@@ -270,17 +331,55 @@ class NumpyBuffer:
     def __len__(self) -> int:
         return len(self.data)
 
-    def to_file(self, file: Path) -> None:
+    def to_file(self, file: Path, chunk_size: int = 65536) -> None:
         """Writes the buffer to a file in the specified format"""
-        with open(file, "wb", encoding="utf-8") as f:
-            f.write(self.get_bytes())
+        with open(file, "wb") as f:
+            if self.data.flags.c_contiguous:
+                self.data.tofile(f)
+                return
+            # Data is a strided view into a wider buffer, pack it in chunks of rows
+            for start in range(0, len(self.data), chunk_size):
+                f.write(self.data[start : start + chunk_size].tobytes())
+
+    def has_layout(self, layout: BufferLayout) -> bool:
+        """Returns True if given layout matches the layout of the buffer"""
+        if layout is self.layout:
+            return True
+        numpy_type = layout.get_numpy_type()
+        if layout is self._matched_layout and numpy_type is self._matched_numpy_type:
+            return True
+        if layout != self.layout:
+            return False
+        self._matched_layout, self._matched_numpy_type = layout, numpy_type
+        return True
 
     def append(self, other: "NumpyBuffer") -> None:
         """Appends another NumpyBuffer to this one"""
-        if self.layout != other.layout:
+        if not self.has_layout(other.layout):
             raise ValueError("Layouts do not match!")
-        self.data = (
-            other.data if len(self.data) == 0 else numpy.append(self.data, other.data)
+        size = len(self.data)
+        new_size = size + len(other.data)
+        # Reuse spare capacity left by previous appends, unless data was replaced since then
+        storage = self._storage if self.data is self._storage_view else None
+        if storage is None or len(storage) < new_size:
+            # Double the capacity on every reallocation to keep appends amortized O(1)
+            storage = numpy.empty(max(new_size, 2 * size), dtype=self.data.dtype)
+            storage[:size] = self.data
+        storage[size:new_size] = other.data
+        self._storage = storage
+        self.data = self._storage_view = storage[:new_size]
+
+    @classmethod
+    def concatenate(cls, buffers: list["NumpyBuffer"]) -> "NumpyBuffer":
+        """Returns a new NumpyBuffer with the data of all given buffers, allocated at once"""
+        if len(buffers) == 0:
+            raise ValueError("Nothing to concatenate!")
+        first = buffers[0]
+        for buffer in buffers[1:]:
+            if not first.has_layout(buffer.layout):
+                raise ValueError("Layouts do not match!")
+        return cls(
+            first.layout, numpy.concatenate([buffer.data for buffer in buffers])
         )
 
     def copy(self) -> "NumpyBuffer":
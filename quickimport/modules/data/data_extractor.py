@@ -1,12 +1,14 @@
 import collections
 import copy
+import hashlib
+import weakref
 import numpy
 from numpy.typing import NDArray, DTypeLike
 import time
+from bpy.app.handlers import persistent
 from bpy.types import Mesh, Object
 
 from typing import Optional, Callable
-from operator import attrgetter
 
 from .byte_buffer import (
     AbstractSemantic,
@@ -14,10 +16,57 @@ from .byte_buffer import (
     BufferSemantic,
     NumpyBuffer,
     BufferLayout,
+    apply_converters,
 )
 from .dxgi_format import DXGIFormat, DXGIType
 
 
+class ExportCache(collections.OrderedDict):
+    """
+    Least recently used cache of arrays derived from exported meshes, bounded by the
+    total size of the arrays it holds. Every instance is emptied when a file is loaded
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        super().__init__()
+        self.max_bytes = max_bytes
+        # Weak reference, dropped from the list again once the cache is collected
+        export_caches.append(weakref.ref(self, export_caches.remove))
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > 1 and self.get_size() > self.max_bytes:
+            self.popitem(last=False)
+
+    def get_size(self) -> int:
+        return sum(
+            item.nbytes
+            for value in self.values()
+            for item in value
+            if isinstance(item, numpy.ndarray)
+        )
+
+
+export_caches: "list[weakref.ref[ExportCache]]" = []
+
+
+@persistent
+def clear_export_caches(*args) -> None:
+    """load_post handler, added and removed by registration.register() / unregister()"""
+    # Cached data is keyed by mesh name, which means nothing in another file
+    for ref in export_caches:
+        cache = ref()
+        if cache is not None:
+            cache.clear()
+
+
 class BlenderDataExtractor:
     blender_data_formats: dict[Semantic, DXGIFormat]
     blender_loop_semantics: list[Semantic] = [
@@ -36,6 +85,13 @@ class BlenderDataExtractor:
     ]
     format_converters: dict[AbstractSemantic, list[Callable]] = {}
     semantic_converters: dict[AbstractSemantic, list[Callable]] = {}
+    # Upper bound of memory used to keep tangents of recently exported meshes
+    tangents_cache_bytes: int = 256 * 1024 * 1024
+
+    def __init__(self) -> None:
+        # Loop tangents and bitangent signs of exported meshes keyed by (mesh name, UV map),
+        # stored along with the fingerprint of the data they were calculated from
+        self.tangents_cache = ExportCache(self.tangents_cache_bytes)
 
     def get_data(
         self,
@@ -44,6 +100,7 @@ class BlenderDataExtractor:
         blender_data_formats: dict[Semantic, DXGIFormat],
         semantic_converters: dict[AbstractSemantic, list[Callable]],
         format_converters: dict[AbstractSemantic, list[Callable]],
+        tangent_uvmap: str,
         vertex_ids_cache: Optional[NDArray] = None,
         flip_winding=False,
     ) -> tuple[Optional[NDArray], NumpyBuffer]:
@@ -68,7 +125,11 @@ class BlenderDataExtractor:
         if vertex_ids_cache is None:
             # Extract requested data from blender loop vertices
             loop_data, index_data = self.get_loop_data(
-                mesh, proxy_layout, flip_winding=flip_winding, dedupe=True
+                mesh,
+                proxy_layout,
+                tangent_uvmap,
+                flip_winding=flip_winding,
+                dedupe=True,
             )
             vertex_ids = loop_data.get_field(
                 AbstractSemantic(Semantic.VertexId).get_name()
@@ -99,14 +160,11 @@ class BlenderDataExtractor:
                 vertex_data, semantic_converters, format_converters
             )
         if index_data is not None:
-            for index_converter in semantic_converters.get(
-                AbstractSemantic(Semantic.Index), []
-            ):
-                index_data = index_converter(index_data)
-            for index_converter in format_converters.get(
-                AbstractSemantic(Semantic.Index), []
-            ):
-                index_data = index_converter(index_data)
+            index_data = apply_converters(
+                index_data,
+                semantic_converters.get(AbstractSemantic(Semantic.Index), [])
+                + format_converters.get(AbstractSemantic(Semantic.Index), []),
+            )
 
         return index_data, vertex_buffer
 
@@ -189,6 +247,7 @@ class BlenderDataExtractor:
         self,
         mesh: Mesh,
         proxy_layout: BufferLayout,
+        tangent_uvmap: str,
         flip_winding=False,
         dedupe=False,
     ) -> tuple[NumpyBuffer, NDArray]:
@@ -202,13 +261,36 @@ class BlenderDataExtractor:
             if buffer_semantic.abstract.enum in self.blender_loop_semantics:
                 layout.add_element(buffer_semantic)
 
-        # TODO: Check if the export needs tangents or bitangents
-            # Error out if it does not have a valid UV in these cases
-            # ADD: UI for the user to select which UV map to use for tangent calculation
-        mesh.calc_tangents(uvmap="TEXCOORD.xy")
+        # Before Blender 4.1 loop normals are only updated on request (calc_tangents did it for us)
+        if hasattr(mesh, "calc_normals_split"):
+            mesh.calc_normals_split()
 
-        # Initialize loop data storage
         size = len(mesh.loops)
+        # Loop attributes are fetched once at full precision and shared between the export
+        # and the tangents cache fingerprint, so checking the cache costs few extra fetches
+        vertex_indices = self.fetch_data(mesh.loops, "vertex_index", numpy.uint32, size)
+        normals, uvs = None, {}
+
+        # MikkTSpace is expensive, only run it if the export actually needs tangents
+        tangents, bitangent_signs = None, None
+        if any(
+            buffer_semantic.abstract.enum in [Semantic.Tangent, Semantic.BitangentSign]
+            for buffer_semantic in layout.semantics
+        ):
+            if tangent_uvmap not in mesh.uv_layers:
+                # Raise the same exception type as calc_tangents, so callers handle both alike
+                raise RuntimeError(
+                    f"Mesh {mesh.name} has no UV map called '{tangent_uvmap}'"
+                )
+            normals = self.fetch_data(mesh.loops, "normal", (numpy.float32, 3), size)
+            uvs[tangent_uvmap] = self.fetch_data(
+                mesh.uv_layers[tangent_uvmap].data, "uv", (numpy.float32, 2), size
+            )
+            tangents, bitangent_signs = self.get_loop_tangents(
+                mesh, tangent_uvmap, vertex_indices, normals, uvs[tangent_uvmap]
+            )
+
+        # Initialize loop data storage
         loop_data = NumpyBuffer(layout, size=size)
 
         # Fetch data for requested semantics
@@ -217,21 +299,35 @@ class BlenderDataExtractor:
             semantic_name: str = buffer_semantic.get_name()
             numpy_type = buffer_semantic.get_numpy_type()
             if semantic == Semantic.VertexId:
-                data = self.fetch_data(mesh.loops, "vertex_index", numpy_type, size)
+                data = numpy.empty(size, dtype=numpy_type)
+                data[:] = vertex_indices
             elif semantic == Semantic.Normal:
-                data = self.fetch_data(mesh.loops, "normal", numpy_type, size)
+                if normals is None:
+                    normals = self.fetch_data(
+                        mesh.loops, "normal", (numpy.float32, 3), size
+                    )
+                data = numpy.empty(size, dtype=numpy_type)
+                data.reshape(size, -1)[:] = normals
             elif semantic == Semantic.Tangent:
-                data = self.fetch_data(mesh.loops, "tangent", numpy_type, size)
+                data = numpy.empty(size, dtype=numpy_type)
+                data.ravel()[:] = tangents
             elif semantic == Semantic.BitangentSign:
-                data = self.fetch_data(mesh.loops, "bitangent_sign", numpy_type, size)
+                data = numpy.empty(size, dtype=numpy_type)
+                data.ravel()[:] = bitangent_signs
             elif semantic == Semantic.Color:
                 data = self.fetch_data(
                     mesh.vertex_colors[semantic_name].data, "color", numpy_type, size
                 )
             elif semantic == Semantic.TexCoord:
-                data = self.fetch_data(
-                    mesh.uv_layers[semantic_name].data, "uv", numpy_type, size
-                )
+                if semantic_name not in uvs:
+                    uvs[semantic_name] = self.fetch_data(
+                        mesh.uv_layers[semantic_name].data,
+                        "uv",
+                        (numpy.float32, 2),
+                        size,
+                    )
+                data = numpy.empty(size, dtype=numpy_type)
+                data.reshape(size, -1)[:] = uvs[semantic_name]
             else:
                 continue
             self.sanitize_blender_data(data)
@@ -255,21 +351,19 @@ class BlenderDataExtractor:
             # Swap every first with every third element of loop data array
             loop_data.data = loop_data.data[indices]
 
+        # Remove vertices with the exactly same attributes, the IB then maps every loop to its
+        # deduplicated vertex (numbered in order of first use)
+        # Note: foreach_get provides loop data in the same order as iteration over polygons
+        if dedupe:
+            vertex_indices = loop_data.deduplicate()
+        else:
+            vertex_indices = numpy.arange(len(loop_data))
+
         # Build IB
         index_data = None
         index_semantic = proxy_layout.get_element(AbstractSemantic(Semantic.Index))
         if index_semantic is not None:
-            indexed_vertices = collections.OrderedDict()
-            # Note: foreach_get provides loop data in the same order as iteration over polygons
-            index_data = [
-                indexed_vertices.setdefault(data.tobytes(), len(indexed_vertices))
-                for data in loop_data.data
-            ]
-            index_data = numpy.array(index_data, dtype=index_semantic.get_numpy_type())
-
-        # Remove vertices with the exactly same attributes
-        if dedupe:
-            loop_data.remove_duplicates()
+            index_data = vertex_indices.astype(index_semantic.get_numpy_type())
 
         print(
             f"Loop data fetch time: {time.time() - start_time:.3f}s ({len(loop_data.get_data())} vertices, {len(index_data)} indices)"
@@ -277,6 +371,53 @@ class BlenderDataExtractor:
 
         return loop_data, index_data
 
+    def get_loop_tangents(
+        self,
+        mesh: Mesh,
+        uvmap: str,
+        vertex_indices: NDArray,
+        normals: NDArray,
+        uvs: NDArray,
+    ) -> tuple[NDArray, NDArray]:
+        """
+        Returns flat float32 arrays of loop tangents and bitangent signs for given UV map
+        Results are cached per mesh and reused while its geometry, normals and UVs stay the same
+        Loop vertex indices, normals and UVs are passed in as fetched for the export
+        """
+        cache_key = (mesh.name, uvmap)
+        fingerprint = self.get_tangents_fingerprint(mesh, vertex_indices, normals, uvs)
+        cached = self.tangents_cache.get(cache_key)
+        if cached is not None and cached[0] == fingerprint:
+            print(f"Skipped tangents calculation for {mesh.name}!")
+            return cached[1], cached[2]
+
+        mesh.calc_tangents(uvmap=uvmap)
+        size = len(mesh.loops)
+        tangents = self.fetch_data(mesh.loops, "tangent", numpy.float32, size * 3)
+        bitangent_signs = self.fetch_data(
+            mesh.loops, "bitangent_sign", numpy.float32, size
+        )
+
+        self.tangents_cache[cache_key] = (fingerprint, tangents, bitangent_signs)
+
+        return tangents, bitangent_signs
+
+    def get_tangents_fingerprint(
+        self, mesh: Mesh, vertex_indices: NDArray, normals: NDArray, uvs: NDArray
+    ) -> str:
+        """Returns hash of all mesh data MikkTSpace tangents depend on"""
+        digest = hashlib.sha1()
+        for data in [
+            self.fetch_data(mesh.vertices, "co", numpy.float32, len(mesh.vertices) * 3),
+            self.fetch_data(mesh.polygons, "loop_total", numpy.int32),
+            vertex_indices,
+            normals,
+            uvs,
+        ]:
+            # Hash the arrays in place instead of copying them with tobytes
+            digest.update(numpy.ascontiguousarray(data))
+        return digest.hexdigest()
+
     def get_vertex_data(self, mesh: Mesh, proxy_layout: BufferLayout) -> NumpyBuffer:
         start_time = time.time()
 
@@ -293,16 +434,13 @@ class BlenderDataExtractor:
         # Initialize vertex data storage
         size = len(mesh.vertices)
         vertex_data = NumpyBuffer(layout, size=size)
-        vertex_groups = []
+        vertex_groups = None
         for buffer_semantic in proxy_layout.semantics:
             if buffer_semantic.abstract.enum in [
                 Semantic.Blendindices,
                 Semantic.Blendweight,
             ]:
-                vertex_groups = [
-                    sorted(vertex.groups, key=attrgetter("weight"), reverse=True)
-                    for vertex in mesh.vertices
-                ]
+                vertex_groups = self.get_sorted_vertex_groups(mesh)
                 break
 
         # Fetch data for requested semantics
@@ -312,32 +450,16 @@ class BlenderDataExtractor:
             num_values: int = buffer_semantic.get_num_values()
             if semantic == Semantic.Position:
                 data = self.fetch_data(mesh.vertices, "undeformed_co", numpy_type, size)
-            elif semantic == Semantic.Blendindices:
+            elif semantic in [Semantic.Blendindices, Semantic.Blendweight]:
                 dtype: DTypeLike = (
                     numpy_type[0] if isinstance(numpy_type, tuple) else numpy_type
                 )
-                num_vgs: int = buffer_semantic.get_num_values()
-                data = numpy.array(
-                    [
-                        [vg.group for vg in groups[:num_vgs]]
-                        + [0] * (num_vgs - len(groups))
-                        for groups in vertex_groups
-                    ],
-                    dtype=dtype,
-                )
-            elif semantic == Semantic.Blendweight:
-                dtype: DTypeLike = (
-                    numpy_type[0] if isinstance(numpy_type, tuple) else numpy_type
-                )
-                num_vgs: int = buffer_semantic.get_num_values()
-                data = numpy.array(
-                    [
-                        [vg.weight for vg in groups[:num_vgs]]
-                        + [0] * (num_vgs - len(groups))
-                        for groups in vertex_groups
-                    ],
-                    dtype=dtype,
-                )
+                vertex_ids, ranks, groups, weights = vertex_groups
+                values = groups if semantic == Semantic.Blendindices else weights
+                # Keep the num_values heaviest groups of every vertex, padding the rest with zeros
+                data = numpy.zeros((size, num_values), dtype=dtype)
+                top = ranks < num_values
+                data[vertex_ids[top], ranks[top]] = values[top]
             else:
                 continue
             self.sanitize_blender_data(data)
@@ -351,6 +473,35 @@ class BlenderDataExtractor:
 
         return vertex_data
 
+    def get_sorted_vertex_groups(
+        self, mesh: Mesh
+    ) -> tuple[NDArray, NDArray, NDArray, NDArray]:
+        """
+        Returns (vertex id, rank, group, weight) arrays with one entry per vertex group assignment,
+        where rank is the position of the group in its vertex when ordered by descending weight
+        (groups with equal weights keep the order they are listed in the vertex)
+        """
+        # Blender has no bulk accessor for vertex groups, so flatten them in a single pass
+        vertex_ids, groups, weights = [], [], []
+        for vertex in mesh.vertices:
+            for vg in vertex.groups:
+                vertex_ids.append(vertex.index)
+                groups.append(vg.group)
+                weights.append(vg.weight)
+        vertex_ids = numpy.array(vertex_ids, dtype=numpy.int64)
+        groups = numpy.array(groups, dtype=numpy.int64)
+        weights = numpy.array(weights, dtype=numpy.float32)
+
+        # Stable sort by vertex, then by descending weight
+        order = numpy.lexsort((-weights, vertex_ids))
+        vertex_ids, groups, weights = vertex_ids[order], groups[order], weights[order]
+
+        starts = numpy.flatnonzero(numpy.r_[True, vertex_ids[1:] != vertex_ids[:-1]])
+        counts = numpy.diff(numpy.r_[starts, len(vertex_ids)])
+        ranks = numpy.arange(len(vertex_ids)) - numpy.repeat(starts, counts)
+
+        return vertex_ids, ranks, groups, weights
+
     def get_shapekey_data(
         self,
         obj: Object,
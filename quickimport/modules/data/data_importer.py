@@ -3,8 +3,9 @@ import bpy
 
 from typing import List, Dict, Optional
 
-from .byte_buffer import AbstractSemantic, Semantic, BufferSemantic, NumpyBuffer
+from .byte_buffer import AbstractSemantic, Semantic, BufferSemantic, NumpyBuffer, apply_converters
 from .dxgi_format import  DXGIType
+from ..vertexgroups import add_vertex_group_weights
 
 
 class BlenderDataImporter:
@@ -80,20 +81,11 @@ class BlenderDataImporter:
                           semantic_converters: Dict[AbstractSemantic, List[callable]]):
         
         data = buffer.get_field(buffer_semantic.get_name())
-    
-        for converter in format_converters.get(buffer_semantic.abstract, []):
-            try:
-                data = converter(data)
-            except ValueError:
-                if not data.flags.writeable:
-                    data = converter(data.copy())
-
-        for converter in semantic_converters.get(buffer_semantic.abstract, []):
-            try:
-                data = converter(data)
-            except ValueError:
-                if not data.flags.writeable:
-                    data = converter(data.copy())
+
+        # Buffer data is usually read-only, converters modifying it get a single private copy
+        data = apply_converters(data,
+                                format_converters.get(buffer_semantic.abstract, []) +
+                                semantic_converters.get(buffer_semantic.abstract, []))
 
         return data
    
@@ -120,6 +112,9 @@ class BlenderDataImporter:
                              vg_indices: Dict[int, numpy.ndarray], 
                              vg_weights: Dict[int, numpy.ndarray]):
         
+        if not vg_indices:
+            return
+
         assert (len(vg_indices) == len(vg_weights))
 
         num_vertex_groups = max([indices.max() for indices in vg_indices.values()])
@@ -127,15 +122,12 @@ class BlenderDataImporter:
         for i in range(num_vertex_groups + 1):
             obj.vertex_groups.new(name=str(i))
 
-        for semantic_index in sorted(vg_indices.keys()):
-            indices = vg_indices[semantic_index]
-            weights = vg_weights[semantic_index]
-
-        for vertex_id, (indexes, weights) in enumerate(zip(indices, weights)):
-            for index, weight in zip(indexes, weights):
-                if weight == 0.0:
-                    continue
-                obj.vertex_groups[index].add((vertex_id,), weight, 'REPLACE')
+        # Apply all BLENDINDICES / BLENDWEIGHT pairs in semantic order, adding
+        # vertices to each group in batches rather than one at a time
+        semantic_indices = sorted(vg_indices.keys())
+        add_vertex_group_weights(obj,
+                                 [vg_indices[i] for i in semantic_indices],
+                                 [vg_weights[i] for i in semantic_indices])
 
     def import_colors(self, 
                       mesh: bpy.types.Mesh, 
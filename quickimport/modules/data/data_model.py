@@ -1,3 +1,4 @@
+import hashlib
 import time
 from typing import Callable, Optional, Union
 
@@ -11,8 +12,9 @@ from .byte_buffer import (
     NumpyBuffer,
     Semantic,
     BufferSemantic,
+    in_place_converter,
 )
-from .data_extractor import BlenderDataExtractor
+from .data_extractor import BlenderDataExtractor, ExportCache
 from .data_importer import BlenderDataImporter
 from .dxgi_format import DXGIFormat
 from ..datahandling import Fatal
@@ -25,11 +27,17 @@ class DataModel(object):
     flip_tangent: bool = False
     flip_bitangent_sign: bool = False
     flip_texcoord_v: bool = False
+    # UV map to calculate tangents for, passed down to the data extractor
+    tangent_uvmap: str = "TEXCOORD.xy"
 
     data_extractor: BlenderDataExtractor = BlenderDataExtractor()
     buffers_format: dict[str, BufferLayout] = {}
     semantic_converters: dict[AbstractSemantic, list[Callable]] = {}
     format_converters: dict[AbstractSemantic, list[Callable]] = {}
+    # Vertex ids of recent exports that fetched loop data, keyed by model class and mesh
+    # name and stored along with the topology hash they are valid for. Shared by all
+    # instances, as a new model is made for every export (see DataModelXXMI.from_obj)
+    cached_vertex_ids: ExportCache = ExportCache(64 * 1024 * 1024)
 
     blender_data_formats: dict[Semantic, DXGIFormat] = {
         Semantic.Index: DXGIFormat.R32_UINT,
@@ -150,7 +158,7 @@ class DataModel(object):
             )
         except RuntimeError:
             raise Fatal(
-                f"Failed to calculate tangents! Ensure the mesh({obj.name}) has at least 1 UV map called 'TEXCOORD.xy'"
+                f"Failed to calculate tangents! Ensure the mesh({obj.name}) has at least 1 UV map called '{self.tangent_uvmap}'"
             )
         buffers = self.build_buffers(index_data, vertex_buffer, excluded_buffers)
         return buffers, len(vertex_buffer)
@@ -165,6 +173,12 @@ class DataModel(object):
             buffer = None
             if buffer_name in excluded_buffers:
                 continue
+            # Fast path, reference already encoded data without copying it
+            buffer = self.make_buffer_view(buffer_layout, index_data, vertex_buffer)
+            if buffer is not None:
+                result[buffer_name] = buffer
+                continue
+            # Fallback for buffers with data that has to be rearranged or converted
             for semantic in buffer_layout.semantics:
                 if semantic.abstract.enum == Semantic.ShapeKey:
                     continue
@@ -185,6 +199,63 @@ class DataModel(object):
 
         return result
 
+    @staticmethod
+    def make_buffer_view(
+        buffer_layout: BufferLayout,
+        index_data: Optional[NDArray],
+        vertex_buffer: NumpyBuffer,
+    ) -> Optional[NumpyBuffer]:
+        """
+        Returns buffer viewing the rows of index data or vertex buffer through a byte-strided array
+        Only possible when source stores every field of the layout with the same type and relative offset,
+        otherwise returns None
+        The view shares memory with the source, so it is made read-only: anything that needs to
+        modify the returned buffer has to copy it first, or the change would leak into the source
+        """
+        semantics = buffer_layout.semantics
+        if len(semantics) == 0 or any(
+            semantic.abstract.enum == Semantic.ShapeKey for semantic in semantics
+        ):
+            return None
+        dtype = buffer_layout.get_numpy_type()
+
+        if any(semantic.abstract.enum == Semantic.Index for semantic in semantics):
+            if len(semantics) != 1 or index_data is None:
+                return None
+            if index_data.ndim != 1 or index_data.dtype != dtype[0]:
+                return None
+            data = numpy.ascontiguousarray(index_data).view(dtype)
+            data.flags.writeable = False
+            return NumpyBuffer(buffer_layout, data)
+
+        source = vertex_buffer.data
+        if not source.flags.c_contiguous:
+            return None
+        base_offset = None
+        for semantic, name in zip(semantics, dtype.names):
+            source_field = source.dtype.fields.get(semantic.get_name())
+            field_type, field_offset = dtype.fields[name][:2]
+            if source_field is None or source_field[0] != field_type:
+                return None
+            offset = source_field[1] - field_offset
+            if base_offset is None:
+                base_offset = offset
+            elif offset != base_offset:
+                return None
+        if base_offset < 0 or base_offset + dtype.itemsize > source.dtype.itemsize:
+            return None
+
+        # Reinterpret every row as raw bytes, then pick the slice holding the layout
+        rows = source.view(numpy.uint8).reshape(len(source), source.dtype.itemsize)
+        rows = rows[:, base_offset : base_offset + dtype.itemsize]
+        try:
+            data = rows.view(dtype)
+        except ValueError:
+            # NumPy before 1.23 can't change the dtype of non-contiguous arrays, copy instead
+            data = numpy.ascontiguousarray(rows).view(dtype)
+        data.flags.writeable = False
+        return NumpyBuffer(buffer_layout, data.reshape(-1))
+
     def export_data(
         self, context, collection, mesh, excluded_buffers, mirror_mesh: bool = False
     ) -> tuple[NDArray, NumpyBuffer]:
@@ -235,8 +306,6 @@ class DataModel(object):
         fetch_loop_data: bool,
         mirror_mesh: bool = False,
     ) -> tuple[NDArray, NumpyBuffer]:
-        vertex_ids_cache, cache_vertex_ids = None, False
-
         flip_winding = self.flip_winding if not mirror_mesh else not self.flip_winding
         flip_bitangent_sign = (
             self.flip_bitangent_sign
@@ -244,29 +313,11 @@ class DataModel(object):
             else not self.flip_bitangent_sign
         )
 
-        # if not fetch_loop_data:
-        #     if (
-        #         collection
-        #         != context.scene.wwmi_tools_settings.vertex_ids_cached_collection
-        #     ):
-        #         # Cache contains data for different object and must be cleared
-        #         context.scene.wwmi_tools_settings.vertex_ids_cache = ""
-        #         fetch_loop_data = True
-        #         cache_vertex_ids = True
-        #     else:
-        #         # Partial export is enabled
-        #         if context.scene.wwmi_tools_settings.vertex_ids_cache:
-        #             # Valid vertex ids cache exists, lets load it
-        #             vertex_ids_cache = numpy.array(
-        #                 json.loads(context.scene.wwmi_tools_settings.vertex_ids_cache)
-        #             )
-        #         else:
-        #             # Cache is clear, we'll have to fetch loop data once
-        #             fetch_loop_data = True
-        #             cache_vertex_ids = True
-        # elif context.scene.wwmi_tools_settings.vertex_ids_cache:
-        #     # We're going to fetch loop data, cache must be cleared
-        #     context.scene.wwmi_tools_settings.vertex_ids_cache = ""
+        # Must be hashed before get_data, which adds VertexId to the layout
+        topology_hash = self.get_topology_hash(mesh, export_layout, flip_winding)
+        vertex_ids_cache = self.get_vertex_ids_cache(
+            mesh, topology_hash, fetch_loop_data
+        )
 
         # Copy default converters
         semantic_converters, format_converters = {}, {}
@@ -314,32 +365,78 @@ class DataModel(object):
             self.blender_data_formats,
             semantic_converters,
             format_converters,
+            self.tangent_uvmap,
             vertex_ids_cache,
             flip_winding=flip_winding,
         )
 
-        # if cache_vertex_ids:
-        #     # As vertex_ids_cache is None, get_data fetched loop data for us and we can cache vertex ids
-        #     vertex_ids = vertex_buffer.get_field(
-        #         AbstractSemantic(Semantic.VertexId).get_name()
-        #     )
-        #     context.scene.wwmi_tools_settings.vertex_ids_cache = json.dumps(
-        #         vertex_ids.tolist()
-        #     )
-        #     context.scene.wwmi_tools_settings.vertex_ids_cached_collection = collection
+        if vertex_ids_cache is None:
+            self.store_vertex_ids_cache(mesh, vertex_buffer, topology_hash)
 
         return index_buffer, vertex_buffer
 
+    def get_topology_hash(
+        self, mesh: Mesh, export_layout: BufferLayout, flip_winding: bool
+    ) -> str:
+        """
+        Returns hash of everything vertex ids depend on besides loop attribute values:
+        vertex count, loop vertex indices, winding and the set of exported loop semantics
+        """
+        loop_semantics = [
+            f"{semantic.abstract} {semantic.get_format()}"
+            for semantic in export_layout.semantics
+            if semantic.abstract.enum in self.data_extractor.blender_loop_semantics
+        ]
+        digest = hashlib.sha1()
+        digest.update(
+            repr((len(mesh.vertices), flip_winding, loop_semantics)).encode("utf-8")
+        )
+        vertex_indices = self.data_extractor.fetch_data(
+            mesh.loops, "vertex_index", numpy.uint32
+        )
+        digest.update(vertex_indices)
+        return digest.hexdigest()
+
+    def get_vertex_ids_cache(
+        self, mesh: Mesh, topology_hash: str, fetch_loop_data: bool
+    ) -> Optional[NDArray]:
+        """
+        Returns vertex ids cached by previous export of the mesh if loop data fetching can be skipped
+        Partial exports that don't write any loop based buffers can reuse them as long as topology stays the same
+        """
+        if fetch_loop_data:
+            return None
+        cached = self.cached_vertex_ids.get((type(self).__name__, mesh.name))
+        if cached is None or cached[0] != topology_hash:
+            # Cache is clear or belongs to different topology, we'll have to fetch loop data once
+            return None
+        return cached[1]
+
+    def store_vertex_ids_cache(
+        self, mesh: Mesh, vertex_buffer: NumpyBuffer, topology_hash: str
+    ) -> None:
+        # As vertex_ids_cache was None, get_data fetched loop data for us and we can cache vertex ids
+        vertex_ids = vertex_buffer.get_field(
+            AbstractSemantic(Semantic.VertexId).get_name()
+        )
+        self.cached_vertex_ids[(type(self).__name__, mesh.name)] = (
+            topology_hash,
+            vertex_ids.copy(),
+        )
+
     @staticmethod
+    @in_place_converter
     def converter_flip_vector(data: NDArray) -> NDArray:
-        return -data
+        return numpy.negative(data, out=data)
 
     @staticmethod
+    @in_place_converter
     def converter_mirror_vector(data: NDArray) -> NDArray:
         data[:, 0] *= -1
         return data
 
     @staticmethod
+    @in_place_converter
     def converter_flip_texcoord_v(data: NDArray) -> NDArray:
         if data.dtype != numpy.float32:
             data = data.astype(numpy.float32)
@@ -444,10 +541,13 @@ class DataModelXXMI(DataModel):
         game: GameEnum,
         normalize_weights: bool = False,
         is_posed_mesh: bool = False,
+        tangent_uvmap: Optional[str] = None,
     ) -> "DataModelXXMI":
         cls = super().__new__(cls)
         cls.game = game
         cls.normalize_weights = normalize_weights
+        if tangent_uvmap:
+            cls.tangent_uvmap = tangent_uvmap
         for prop in [
             "3DMigoto:FlipNormal",
             "3DMigoto:FlipTangent",
@@ -588,7 +688,7 @@ class DataModelXXMI(DataModel):
                         and cls.normalize_weights
                     ):
                         cls.format_converters[new_semantic.abstract] = [
-                            lambda data: cls.converter_normalize_weights(data)
+                            cls.converter_normalize_weights
                         ]
                     cls.buffers_format["Blend"].add_element(new_semantic)
                 elif new_semantic.abstract.enum in tex_semantics:
@@ -601,10 +701,11 @@ class DataModelXXMI(DataModel):
             bitan_abstract: AbstractSemantic = AbstractSemantic(Semantic.BitangentSign)
             if cls.buffers_format["Position"].get_element(bitan_abstract) is not None:
                 cls.format_converters[bitan_abstract] = [
-                    lambda data: cls.converter_flip_bitangent_sign(data)
+                    cls.converter_flip_bitangent_sign
                 ]
         return cls
 
+    @in_place_converter
     def converter_normalize_weights(self, data: NDArray) -> NDArray:
         """Normalizes weight values to ensure they sum to 1.0 for each vertex"""
         if data.size == data.shape[0]:
@@ -612,10 +713,11 @@ class DataModelXXMI(DataModel):
         sums: NDArray = numpy.sum(data, axis=1, keepdims=True)
         # Avoid division by zero - if sum is 0, set it to 1
         sums[sums == 0] = 1.0
-        normalized: NDArray = data / sums
-
-        return normalized
+        if data.dtype.kind != "f":
+            return data / sums
+        return numpy.divide(data, sums, out=data)
 
+    @in_place_converter
     def converter_flip_bitangent_sign(self, data: NDArray) -> NDArray:
         """Flips the sign of the bitangent vector"""
         data *= -1
@@ -639,6 +741,12 @@ class DataModelXXMI(DataModel):
             else not self.flip_bitangent_sign
         )
 
+        # Must be hashed before get_data, which adds VertexId to the layout
+        topology_hash = self.get_topology_hash(mesh, export_layout, flip_winding)
+        vertex_ids_cache = self.get_vertex_ids_cache(
+            mesh, topology_hash, fetch_loop_data
+        )
+
         # Copy default converters
         semantic_converters: dict[AbstractSemantic, list[Callable]] = {}
         format_converters: dict[AbstractSemantic, list[Callable]] = {}
@@ -694,6 +802,12 @@ class DataModelXXMI(DataModel):
             self.blender_data_formats,
             semantic_converters,
             format_converters,
+            self.tangent_uvmap,
+            vertex_ids_cache,
             flip_winding=flip_winding,
         )
+
+        if vertex_ids_cache is None:
+            self.store_vertex_ids_cache(mesh, vertex_buffer, topology_hash)
+
         return index_buffer, vertex_buffer
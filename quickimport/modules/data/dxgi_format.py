@@ -1,8 +1,9 @@
+import re
 import numpy
 from enum import Enum
-from typing import Callable
+from typing import Callable, Dict, NamedTuple, Optional
 
-from numpy.typing import DTypeLike
+from numpy.typing import DTypeLike, NDArray
 
 
 class Topology(str, Enum):
@@ -38,32 +39,65 @@ class DXGIType(Enum):
         numpy.uint16,
         lambda data: numpy.fromiter(data, numpy.float32),
         None,
-        lambda data: numpy.around(data * 65535.0).astype(numpy.uint16),
-        lambda data: data / 65535.0,
+        lambda data: encode_values(data, DXGIType.UNORM16),
+        lambda data: decode_values(data, DXGIType.UNORM16),
     )
     UNORM8 = (
         numpy.uint8,
         lambda data: numpy.fromiter(data, numpy.float32),
         None,
-        lambda data: numpy.around(data * 255.0).astype(numpy.uint8),
-        lambda data: data / 255.0,
+        lambda data: encode_values(data, DXGIType.UNORM8),
+        lambda data: decode_values(data, DXGIType.UNORM8),
     )
     SNORM16 = (
         numpy.int16,
         lambda data: numpy.fromiter(data, numpy.float32),
         None,
-        lambda data: numpy.around(data * 32767.0).astype(numpy.int16),
-        lambda data: data / 32767.0,
+        lambda data: encode_values(data, DXGIType.SNORM16),
+        lambda data: decode_values(data, DXGIType.SNORM16),
     )
     SNORM8 = (
         numpy.int8,
         lambda data: numpy.fromiter(data, numpy.float32),
         None,
-        lambda data: numpy.around(data * 127.0).astype(numpy.int8),
-        lambda data: data / 127.0,
+        lambda data: encode_values(data, DXGIType.SNORM8),
+        lambda data: decode_values(data, DXGIType.SNORM8),
     )
 
 
+# Scale normalized values are multiplied by when encoded and divided by when decoded
+normalization_scales = {
+    DXGIType.UNORM16: 65535.0,
+    DXGIType.UNORM8: 255.0,
+    DXGIType.SNORM16: 32767.0,
+    DXGIType.SNORM8: 127.0,
+}
+
+
+def encode_values(
+    data, dxgi_type: DXGIType, precision: Optional[DTypeLike] = None
+) -> NDArray:
+    """
+    Encodes an array of values of any shape as dxgi_type. Normalized values are scaled
+    at the given precision (that of data by default) and rounded half to even
+    """
+    numpy_type = dxgi_type.value[0]
+    scale = normalization_scales.get(dxgi_type)
+    if scale is None:
+        return numpy.asarray(data).astype(numpy_type, copy=False)
+    data = numpy.multiply(numpy.asarray(data, precision), scale)
+    numpy.around(data, out=data)
+    return data.astype(numpy_type)
+
+
+def decode_values(data, dxgi_type: DXGIType) -> NDArray:
+    """Inverse of encode_values(), normalized values are decoded at double precision"""
+    scale = normalization_scales.get(dxgi_type)
+    if scale is None:
+        return data
+    return numpy.divide(data, scale)
+
+
 class DXGIFormat(Enum):
     @classmethod
     def from_type(cls, dxgi_type: DXGIType, dimensions) -> "DXGIFormat":
@@ -225,3 +259,60 @@ class DXGIFormat(Enum):
     R8G8B8_SNORM = "R8G8B8_SNORM", DXGIType.SNORM8
     R8G8_SNORM = "R8G8_SNORM", DXGIType.SNORM8
     R8_SNORM = "R8_SNORM", DXGIType.SNORM8
+
+
+class FormatInfo(NamedTuple):
+    numpy_type: DTypeLike
+    components: int
+    # Pass to encode_values() / decode_values() to convert values of this format
+    dxgi_type: DXGIType
+
+    @property
+    def normalization(self) -> Optional[float]:
+        """Scale of normalized formats, None for formats that are not normalized"""
+        return normalization_scales.get(self.dxgi_type)
+
+
+# Formats with every channel sharing the same width, e.g. B8G8R8A8_UNORM or D32_FLOAT:
+# TODO: Support more DXGI formats, e.g. packed ones like R10G10B10A2_UNORM
+format_pattern = re.compile(
+    r"""(?:DXGI_FORMAT_)?([RGBAD](32|16|8)(?:[RGBAD]\2)*)_(FLOAT|UINT|SINT|UNORM|SNORM)"""
+)
+
+# Format string -> FormatInfo, seeded from DXGIFormat and filled in on demand:
+format_registry: Dict[str, FormatInfo] = {
+    member.format: FormatInfo(
+        member.numpy_base_type,
+        member.num_values,
+        member.dxgi_type,
+    )
+    for member in DXGIFormat
+}
+
+
+def get_format_info(fmt: str) -> FormatInfo:
+    """
+    Looks up the NumPy type, component count and normalization scale of fmt,
+    with or without the DXGI_FORMAT_ prefix. Formats missing from DXGIFormat
+    are resolved once from their name and remembered.
+    """
+    info = format_registry.get(fmt)
+    if info is not None:
+        return info
+    if fmt.startswith("DXGI_FORMAT_"):
+        info = format_registry.get(fmt[12:])
+    if info is None:
+        match = format_pattern.match(fmt)
+        dxgi_type = None
+        if match is not None:
+            channels, bit_width, kind = match.groups()
+            dxgi_type = DXGIType.__members__.get(kind + bit_width)
+        if dxgi_type is None:
+            raise ValueError(f"Unsupported DXGI format {fmt}!")
+        info = FormatInfo(
+            dxgi_type.value[0],
+            channels.count(bit_width),
+            dxgi_type,
+        )
+    format_registry[fmt] = info
+    return info
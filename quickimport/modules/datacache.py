@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import zipfile
+
+import numpy
+
+from .datastructures import (
+    IndexBuffer,
+    IndividualVertexBuffer,
+    InputLayout,
+    VertexBufferGroup,
+)
+
+# Bump whenever the layout of the cached data or the parsers change in a way
+# that would make existing cache entries decode differently:
+CACHE_VERSION = 2
+CACHE_DIR_NAME = ".quickimport_cache"
+
+
+def vb_to_arrays(vb: VertexBufferGroup):
+    meta = {
+        "layout": vb.layout.serialise(),
+        "first": vb.first,
+        "vertex_count": vb.vertex_count,
+        "topology": vb.topology,
+        "vbs": [
+            {
+                "idx": x.idx,
+                "first": x.first,
+                "vertex_count": x.vertex_count,
+                "offset": x.offset,
+                "stride": x.stride,
+                "topology": x.topology,
+            }
+            for x in vb.vbs
+        ],
+    }
+    arrays = {"vb.meta": numpy.array(json.dumps(meta))}
+    for semantic, data in vb.columns.items():
+        arrays["vb.columns." + semantic] = data
+    return arrays
+
+
+def vb_from_arrays(arrays):
+    meta = json.loads(str(arrays["vb.meta"]))
+    vb = VertexBufferGroup(layout=InputLayout(meta["layout"]))
+    vb.first = meta["first"]
+    vb.vertex_count = meta["vertex_count"]
+    vb.topology = meta["topology"]
+    for x in meta["vbs"]:
+        raw_vb = IndividualVertexBuffer(x["idx"], layout=vb.layout)
+        raw_vb.first = x["first"]
+        raw_vb.vertex_count = x["vertex_count"]
+        raw_vb.offset = x["offset"]
+        raw_vb.stride = x["stride"]
+        raw_vb.topology = x["topology"]
+        vb.vbs.append(raw_vb)
+        vb.slots[raw_vb.idx] = raw_vb
+    prefix = "vb.columns."
+    vb.columns = {
+        name[len(prefix) :]: arrays[name]
+        for name in arrays.files
+        if name.startswith(prefix)
+    }
+    vb.flag_invalid_semantics()
+    return vb
+
+
+def ib_to_arrays(ib: IndexBuffer):
+    meta = {
+        "first": ib.first,
+        "index_count": ib.index_count,
+        "format": ib.format,
+        "offset": ib.offset,
+        "topology": ib.topology,
+        "used_in_drawcall": ib.used_in_drawcall,
+    }
+    return {"ib.meta": numpy.array(json.dumps(meta)), "ib.faces": ib.faces}
+
+
+def ib_from_arrays(arrays):
+    meta = json.loads(str(arrays["ib.meta"]))
+    ib = IndexBuffer(meta["format"])
+    ib.first = meta["first"]
+    ib.index_count = meta["index_count"]
+    ib.offset = meta["offset"]
+    ib.topology = meta["topology"]
+    ib.used_in_drawcall = meta["used_in_drawcall"]
+    ib.faces = arrays["ib.faces"]
+    return ib
+
+
+class ParseCache(object):
+    """
+    On-disk cache of parsed vertex and index buffers, stored as one .npz file
+    per mesh. Entries are keyed by the path, size and modification time of
+    every file that went into the mesh along with the options used to parse
+    them, so editing or replacing a dump invalidates them automatically. Once
+    the cache grows past size_limit bytes the least recently used entries are
+    removed.
+    """
+
+    def __init__(self, cache_dir, size_limit):
+        self.cache_dir = cache_dir
+        self.size_limit = size_limit
+
+    @staticmethod
+    def key(paths, **options):
+        files = []
+        for path in paths:
+            st = os.stat(path)
+            files.append((os.path.abspath(path), st.st_size, st.st_mtime_ns))
+        key = json.dumps([CACHE_VERSION, files, sorted(options.items())])
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, key + ".npz")
+
+    def load(self, key):
+        path = self.entry_path(key)
+        try:
+            with numpy.load(path, allow_pickle=False) as arrays:
+                vb = vb_from_arrays(arrays)
+                ib = None
+                if "ib.meta" in arrays.files:
+                    ib = ib_from_arrays(arrays)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            print("Discarding unreadable parse cache entry %s: %s" % (path, e))
+            self.remove(path)
+            return None
+        # Modification time doubles as the last use time for eviction:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return vb, ib
+
+    def store(self, key, vb, ib):
+        arrays = vb_to_arrays(vb)
+        if ib is not None:
+            arrays.update(ib_to_arrays(ib))
+        path = self.entry_path(key)
+        tmp_path = path + ".tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                numpy.savez(f, **arrays)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # The dump may be on read-only media - caching is only an
+            # optimisation, so carry on with the import regardless:
+            print("Unable to write parse cache entry %s: %s" % (path, e))
+            self.remove(tmp_path)
+            return
+        self.evict()
+
+    def evict(self):
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(".npz"):
+                        continue
+                    try:
+                        if entry.is_file():
+                            st = entry.stat()
+                            entries.append((st.st_mtime, st.st_size, entry.path))
+                    except OSError:
+                        # Removed by another import in the meantime
+                        continue
+        except OSError:
+            return
+        entries.sort(reverse=True)
+        total = 0
+        for _, size, path in entries:
+            total += size
+            if total > self.size_limit:
+                self.remove(path)
+
+    @staticmethod
+    def remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -1,11 +1,13 @@
 import json
 import os
 import re
+import zipfile
 from pathlib import Path
 
 
 import bmesh
 import bpy
+import numpy
 from bpy.types import Context, Mesh, Object, Operator
 from bpy_extras.io_utils import axis_conversion
 from mathutils import Vector
@@ -80,8 +82,8 @@ def assert_pointlist_ib_is_pointless(ib: IndexBuffer, vb: VertexBufferGroup):
     # index buffers are the trivial case that lists every vertex in order, and
     # just ignore them since we already loaded the vertex buffer in that order.
     assert len(vb) == len(ib)  # FIXME: Properly implement point list index buffers
-    assert all(
-        [(i,) == j for i, j in enumerate(ib.faces)]
+    assert numpy.array_equal(
+        ib.faces.ravel(), numpy.arange(len(ib.faces))
     )  # FIXME: Properly implement point list index buffers
 
 
@@ -121,7 +123,42 @@ def open_frame_analysis_log_file(dirname: Path) -> FALogFile:
         path = os.path.join(dirname, "..", f"log-0x{context}.txt")
     else:
         path = os.path.join(dirname, "log.txt")
-    return FALogFile(open(path, "r"))
+
+    # Reuse the binary index saved alongside the log by a previous import as
+    # long as the log hasn't changed since:
+    st = os.stat(path)
+    index_path = path + ".qiidx"
+    try:
+        with open(index_path, "rb") as f:
+            log = FALogFile.load_index(f, st.st_size, st.st_mtime_ns)
+        if log is not None:
+            return log
+    except FileNotFoundError:
+        pass
+    except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile) as e:
+        # e.g. truncated by an interrupted write, it will be saved again below:
+        print(
+            "Discarding unreadable frame analysis log index %s: %s" % (index_path, e)
+        )
+        remove_file(index_path)
+
+    with open(path, "r") as f:
+        log = FALogFile(f)
+    try:
+        with open(index_path + ".tmp", "wb") as f:
+            log.save_index(f, st.st_size, st.st_mtime_ns)
+        os.replace(index_path + ".tmp", index_path)
+    except OSError as e:
+        print("Unable to save frame analysis log index %s: %s" % (index_path, e))
+        remove_file(index_path + ".tmp")
+    return log
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
 
 
 # Parsing the headers for vb0 txt files
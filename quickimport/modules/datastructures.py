@@ -1,15 +1,21 @@
+import bisect
 import collections
 import io
-import itertools
+import json
+import os
 import re
-import struct
 import textwrap
+import warnings
 from enum import Enum
 import numpy
 from mathutils import Matrix
 
+from .data.dxgi_format import decode_values, encode_values, get_format_info
+
 IOOBJOrientationHelper = type("DummyIOOBJOrientationHelper", (object,), {})
 vertex_color_layer_channels = 4
+# Number of vertices / faces encoded at a time when writing buffers to disk:
+WRITE_CHUNK_SIZE = 65536
 
 
 class GameEnum(str, Enum):
@@ -48,98 +54,39 @@ class Fatal(Exception):
     pass
 
 
-# TODO: Support more DXGI formats:
-f32_pattern = re.compile(r"""(?:DXGI_FORMAT_)?(?:[RGBAD]32)+_FLOAT""")
-f16_pattern = re.compile(r"""(?:DXGI_FORMAT_)?(?:[RGBAD]16)+_FLOAT""")
-u32_pattern = re.compile(r"""(?:DXGI_FORMAT_)?(?:[RGBAD]32)+_UINT""")
-u16_pattern = re.compile(r"""(?:DXGI_FORMAT_)?(?:[RGBAD]16)+_UINT""")
-u8_pattern = re.compile(r"""(?:DXGI_FORMAT_)?(?:[RGBAD]8)+_UINT""")
-s32_pattern = re.compile(r"""(?:DXGI_FORMAT_)?(?:[RGBAD]32)+_SINT""")
-s16_pattern = re.compile(r"""(?:DXGI_FORMAT_)?(?:[RGBAD]16)+_SINT""")
-s8_pattern = re.compile(r"""(?:DXGI_FORMAT_)?(?:[RGBAD]8)+_SINT""")
-unorm16_pattern = re.compile(r"""(?:DXGI_FORMAT_)?(?:[RGBAD]16)+_UNORM""")
-unorm8_pattern = re.compile(r"""(?:DXGI_FORMAT_)?(?:[RGBAD]8)+_UNORM""")
-snorm16_pattern = re.compile(r"""(?:DXGI_FORMAT_)?(?:[RGBAD]16)+_SNORM""")
-snorm8_pattern = re.compile(r"""(?:DXGI_FORMAT_)?(?:[RGBAD]8)+_SNORM""")
-
 misc_float_pattern = re.compile(
     r"""(?:DXGI_FORMAT_)?(?:[RGBAD][0-9]+)+_(?:FLOAT|UNORM|SNORM)"""
 )
 misc_int_pattern = re.compile(r"""(?:DXGI_FORMAT_)?(?:[RGBAD][0-9]+)+_[SU]INT""")
 
 
+def format_info(fmt):
+    """
+    Returns the FormatInfo (NumPy type, component count and normalization
+    scale) of fmt from the format registry shared with DXGIFormat.
+    """
+    try:
+        return get_format_info(fmt)
+    except ValueError:
+        raise Fatal("File uses an unsupported DXGI Format: %s" % fmt)
+
+
 def EncoderDecoder(fmt):
-    if f32_pattern.match(fmt):
-        return (
-            lambda data: b"".join(struct.pack("<f", x) for x in data),
-            lambda data: numpy.frombuffer(data, numpy.float32).tolist(),
-        )
-    if f16_pattern.match(fmt):
-        return (
-            lambda data: numpy.fromiter(data, numpy.float16).tobytes(),
-            lambda data: numpy.frombuffer(data, numpy.float16).tolist(),
-        )
-    if u32_pattern.match(fmt):
-        return (
-            lambda data: numpy.fromiter(data, numpy.uint32).tobytes(),
-            lambda data: numpy.frombuffer(data, numpy.uint32).tolist(),
-        )
-    if u16_pattern.match(fmt):
-        return (
-            lambda data: numpy.fromiter(data, numpy.uint16).tobytes(),
-            lambda data: numpy.frombuffer(data, numpy.uint16).tolist(),
-        )
-    if u8_pattern.match(fmt):
-        return (
-            lambda data: numpy.fromiter(data, numpy.uint8).tobytes(),
-            lambda data: numpy.frombuffer(data, numpy.uint8).tolist(),
-        )
-    if s32_pattern.match(fmt):
-        return (
-            lambda data: numpy.fromiter(data, numpy.int32).tobytes(),
-            lambda data: numpy.frombuffer(data, numpy.int32).tolist(),
-        )
-    if s16_pattern.match(fmt):
-        return (
-            lambda data: numpy.fromiter(data, numpy.int16).tobytes(),
-            lambda data: numpy.frombuffer(data, numpy.int16).tolist(),
-        )
-    if s8_pattern.match(fmt):
-        return (
-            lambda data: numpy.fromiter(data, numpy.int8).tobytes(),
-            lambda data: numpy.frombuffer(data, numpy.int8).tolist(),
-        )
+    """
+    Per-element encoder and decoder for fmt, only kept for callers that still
+    work on one vertex at a time - use encode_values() / decode_values() to
+    convert whole columns.
+    """
+    info = format_info(fmt)
 
-    if unorm16_pattern.match(fmt):
-        return (
-            lambda data: numpy.around((numpy.fromiter(data, numpy.float32) * 65535.0))
-            .astype(numpy.uint16)
-            .tobytes(),
-            lambda data: (numpy.frombuffer(data, numpy.uint16) / 65535.0).tolist(),
-        )
-    if unorm8_pattern.match(fmt):
-        return (
-            lambda data: numpy.around((numpy.fromiter(data, numpy.float32) * 255.0))
-            .astype(numpy.uint8)
-            .tobytes(),
-            lambda data: (numpy.frombuffer(data, numpy.uint8) / 255.0).tolist(),
-        )
-    if snorm16_pattern.match(fmt):
-        return (
-            lambda data: numpy.around((numpy.fromiter(data, numpy.float32) * 32767.0))
-            .astype(numpy.int16)
-            .tobytes(),
-            lambda data: (numpy.frombuffer(data, numpy.int16) / 32767.0).tolist(),
-        )
-    if snorm8_pattern.match(fmt):
-        return (
-            lambda data: numpy.around((numpy.fromiter(data, numpy.float32) * 127.0))
-            .astype(numpy.int8)
-            .tobytes(),
-            lambda data: (numpy.frombuffer(data, numpy.int8) / 127.0).tolist(),
-        )
+    def encoder(data):
+        return encode_values(list(data), info.dxgi_type, numpy.float32).tobytes()
+
+    def decoder(data):
+        values = numpy.frombuffer(data, info.numpy_type)
+        return decode_values(values, info.dxgi_type).tolist()
 
-    raise Fatal("File uses an unsupported DXGI Format: %s" % fmt)
+    return encoder, decoder
 
 
 components_pattern = re.compile(r"""(?<![0-9])[0-9]+(?![0-9])""")
@@ -149,11 +96,52 @@ def format_components(fmt):
     return len(components_pattern.findall(fmt))
 
 
+def format_numpy_type(fmt):
+    """
+    Returns the NumPy type each component of the format is stored as, and the
+    scale normalised formats are divided by when decoded (None otherwise).
+    """
+    info = format_info(fmt)
+    return info.numpy_type, info.normalization
+
+
 def format_size(fmt):
     matches = components_pattern.findall(fmt)
     return sum(map(int, matches)) // 8
 
 
+def map_buffer(f, dtype, offset=0, count=-1):
+    """
+    Memory maps count items of dtype starting at offset in the binary file f,
+    or as many complete items as are available if count is negative or runs
+    past the end of the file. Pages are only read in from the file when the
+    returned array is accessed, so large dumps cost nothing beyond the range
+    that is actually used.
+    """
+    dtype = numpy.dtype(dtype)
+    available = max(f.seek(0, io.SEEK_END) - offset, 0) // dtype.itemsize
+    if count < 0 or count > available:
+        count = available
+    if count == 0:
+        # mmap cannot map an empty range
+        return numpy.empty(0, dtype)
+    return numpy.memmap(f, dtype=dtype, mode="r", offset=offset, shape=(count,))
+
+
+def write_array(f, data):
+    """
+    Writes the raw bytes of data to the binary file f, directly from the
+    array where possible to avoid making another copy of it in memory.
+    """
+    try:
+        f.fileno()
+    except (io.UnsupportedOperation, AttributeError):
+        # Not backed by a real file (e.g. io.BytesIO):
+        f.write(data.tobytes())
+        return
+    data.tofile(f)
+
+
 class InputLayoutElement(object):
     def __init__(self, arg):
         self.RemappedSemanticName = None
@@ -163,6 +151,9 @@ class InputLayoutElement(object):
         else:
             self.from_dict(arg)
 
+        self.format_info = format_info(self.Format)
+        self.numpy_type = self.format_info.numpy_type
+        self.normalization = self.format_info.normalization
         self.encoder, self.decoder = EncoderDecoder(self.Format)
 
     def from_file(self, f):
@@ -301,6 +292,29 @@ class InputLayoutElement(object):
     def decode(self, data):
         return self.decoder(data)
 
+    def numpy_dtype(self):
+        return numpy.dtype((self.numpy_type, (self.format_len,)))
+
+    def decode_array(self, data):
+        # Whole column equivalent of decode(), data is this element's field
+        # viewed through a structured dtype and has one row per vertex:
+        return decode_values(data, self.format_info.dxgi_type)
+
+    def encode_array(self, data):
+        # Whole column equivalent of encode(), returns an array that can be
+        # assigned to this element's field in a structured array:
+        # Normalized values are scaled at single precision, as they always were:
+        data = numpy.asarray(data)[:, : self.format_len]
+        return encode_values(data, self.format_info.dxgi_type, numpy.float32)
+
+    def column_type(self):
+        """NumPy type used to store this element when parsed from text"""
+        if self.is_float():
+            # Keep the full precision of the text, the same as the Python
+            # floats this used to be parsed into:
+            return numpy.float64
+        return self.numpy_type
+
     def __eq__(self, other):
         return (
             self.SemanticName == other.SemanticName
@@ -377,6 +391,76 @@ class InputLayout(object):
             vertex[elem.name] = elem.decode(data)
         return vertex
 
+    def numpy_dtype(self, vbuf_idx, stride):
+        """
+        Structured dtype matching one vertex of the given vertex buffer, with a
+        field for each of its elements at their AlignedByteOffset. Elements
+        that do not fit within the stride are left out with a warning.
+        """
+        names, formats, offsets = [], [], []
+        for elem in self.elems.values():
+            if elem.InputSlot != vbuf_idx:
+                # Belongs to a different vertex buffer
+                continue
+            if elem.AlignedByteOffset + elem.size() > stride:
+                print(
+                    "WARNING: Vertex semantic %s at offset %i does not fit in the %i byte stride of vb%i, skipping"
+                    % (elem.name, elem.AlignedByteOffset, stride, vbuf_idx)
+                )
+                continue
+            names.append(elem.name)
+            formats.append(elem.numpy_dtype())
+            offsets.append(elem.AlignedByteOffset)
+        return numpy.dtype(
+            {
+                "names": names,
+                "formats": formats,
+                "offsets": offsets,
+                "itemsize": stride,
+            }
+        )
+
+    def encode_columns(self, columns, vbuf_idx, stride, start=0, stop=None):
+        """
+        Bulk equivalent of encode(), packing per-semantic columns into a
+        structured array with one stride sized row per vertex. start and stop
+        select a range of vertices to encode, defaulting to all of them.
+        """
+        elems = []
+        for semantic in columns:
+            if semantic.startswith("~"):
+                continue
+            elem = self.elems[semantic]
+            if vbuf_idx.isnumeric() and elem.InputSlot != int(vbuf_idx):
+                # Belongs to a different vertex buffer
+                continue
+            elems.append(elem)
+        dtype = numpy.dtype(
+            {
+                "names": [elem.name for elem in elems],
+                "formats": [elem.numpy_dtype() for elem in elems],
+                "offsets": [elem.AlignedByteOffset for elem in elems],
+                "itemsize": stride,
+            }
+        )
+        vertex_count = len(next(iter(columns.values()), ()))
+        start, stop, _ = slice(start, stop).indices(vertex_count)
+        buf = numpy.zeros(max(stop - start, 0), dtype)
+        for elem in elems:
+            data = elem.encode_array(columns[elem.name][start:stop])
+            buf[elem.name][:, : data.shape[1]] = data
+        return buf
+
+    def decode_columns(self, data):
+        """
+        Bulk equivalent of decode() for a structured array created with
+        numpy_dtype(), returning one array per semantic with a row per vertex.
+        """
+        return {
+            name: self.elems[name].decode_array(data[name])
+            for name in data.dtype.names
+        }
+
     def __eq__(self, other):
         return self.elems == other.elems
 
@@ -465,11 +549,12 @@ class IndividualVertexBuffer(object):
     """
 
     vb_elem_pattern = re.compile(
-        r"""vb\d+\[\d*\]\+\d+ (?P<semantic>[^:]+): (?P<data>.*)$"""
+        r"""^[ \t]*vb\d+\[\d*\]\+\d+ (?P<semantic>[^:\n]+): (?P<data>[^\n]*)""",
+        re.MULTILINE,
     )
 
     def __init__(self, idx, f=None, layout=None, load_vertices=True):
-        self.vertices = []
+        self.columns = {}
         self.layout = layout and layout or InputLayout()
         self.first = 0
         self.vertex_count = 0
@@ -508,70 +593,78 @@ class IndividualVertexBuffer(object):
         # If the buffer is only per-instance elements there won't be any
         # vertices. If the buffer has any per-vertex elements than we should
         # have the number of vertices declared in the header.
-        if self.vertices:
-            assert len(self.vertices) == self.vertex_count
+        for data in self.columns.values():
+            assert len(data) == self.vertex_count
 
     def parse_vb_bin(self, f, use_drawcall_range=False):
-        f.seek(self.offset)
+        offset, count = self.offset, -1
         if use_drawcall_range:
-            f.seek(self.first * self.stride, 1)
+            offset += self.first * self.stride
+            count = self.vertex_count
         else:
             self.first = 0
-        for i in itertools.count():
-            if use_drawcall_range and i == self.vertex_count:
-                break
-            vertex = f.read(self.stride)
-            if not vertex:
-                break
-            self.vertices.append(self.layout.decode(vertex, self.idx))
+        # Map the whole slot with one structured dtype - each semantic is then
+        # a strided view into the file and only the pages in the requested
+        # range are ever read. Any incomplete vertex at the end is dropped:
+        dtype = self.layout.numpy_dtype(self.idx, self.stride)
+        data = map_buffer(f, dtype, offset, count)
+        # Copy out any columns that are still views of the mapping, so the
+        # file is not held open (and locked on Windows) after the import:
+        self.columns = {
+            name: (
+                numpy.array(column) if numpy.may_share_memory(column, data) else column
+            )
+            for name, column in self.layout.decode_columns(data).items()
+        }
         # We intentionally disregard the vertex count when loading from a
         # binary file, as we assume frame analysis might have only dumped a
         # partial buffer to the .txt files (e.g. if this was from a dump where
         # the draw call index count was overridden it may be cut short, or
         # where the .txt files contain only sub-meshes from each draw call and
         # we are loading the .buf file because it contains the entire mesh):
-        self.vertex_count = len(self.vertices)
-
-    def append(self, vertex):
-        self.vertices.append(vertex)
-        self.vertex_count += 1
+        self.vertex_count = len(data)
 
     def parse_vertex_data(self, f):
-        vertex = {}
-        for line in map(str.strip, f):
-            # print(line)
-            if line.startswith("instance-data:"):
-                break
-
-            match = self.vb_elem_pattern.match(line)
-            if match:
-                vertex[match.group("semantic")] = self.parse_vertex_element(match)
-            elif line == "" and vertex:
-                self.vertices.append(vertex)
-                vertex = {}
-        if vertex:
-            self.vertices.append(vertex)
+        # Group the vertex data by semantic first, then convert each semantic
+        # with a single NumPy cast rather than a regex match per line and a
+        # conversion per field:
+        data = f.read().split("instance-data:", 1)[0]
+        fields = collections.defaultdict(list)
+        for semantic, line in self.vb_elem_pattern.findall(data):
+            fields[semantic].append(line)
+        self.columns = {}
+        for semantic, lines in fields.items():
+            elem = self.layout[semantic]
+            data = ",".join(lines)
+            if elem.Format.endswith("INT"):
+                values = numpy.fromstring(data, numpy.int64, sep=",")
+            else:
+                values = self.ms_floats(data)
+            column = values.astype(elem.column_type()).reshape(len(lines), -1)
+            self.columns[semantic] = column
 
     @staticmethod
-    def ms_float(val):
-        x = val.split(".#")
-        s = float(x[0])
-        if len(x) == 1:
-            return s
-        if x[1].startswith("INF"):
-            return s * numpy.inf  # Will preserve sign
+    def ms_floats(data):
+        with warnings.catch_warnings():
+            # Older NumPy only warns when it stops short of the end:
+            warnings.simplefilter("error", DeprecationWarning)
+            try:
+                return numpy.fromstring(data, numpy.float64, sep=",")
+            except (ValueError, DeprecationWarning):
+                pass
+        # Fallback for dumps containing the MSVC 1.#INF / 1.#QNAN style
+        # tokens, still handled as a whole array:
+        tokens = numpy.array(data.split(","))
+        head, sep, tail = numpy.char.partition(tokens, ".#").T
+        values = head.astype(numpy.float64)
+        special = sep != ""
+        inf = special & (numpy.char.find(tail, "INF") == 0)
+        nan = special & ~inf
+        values[inf] *= numpy.inf  # Will preserve sign
         # TODO: Differentiate between SNAN / QNAN / IND
-        if s == -1:  # Multiplying -1 * nan doesn't preserve sign
-            return -numpy.nan  # so must use unary - operator
-        return numpy.nan
-
-    def parse_vertex_element(self, match):
-        fields = match.group("data").split(",")
-
-        if self.layout[match.group("semantic")].Format.endswith("INT"):
-            return tuple(map(int, fields))
-
-        return tuple(map(self.ms_float, fields))
+        # Multiplying -1 * nan doesn't preserve sign, so must use unary -
+        values[nan] = numpy.where(values[nan] == -1, -numpy.nan, numpy.nan)
+        return values
 
 
 class VertexBufferGroup(object):
@@ -586,7 +679,7 @@ class VertexBufferGroup(object):
     # parameters, as they would all share the *same* InputLayout since the
     # default values are only evaluated once on file load
     def __init__(self, files=None, layout=None, load_vertices=True, topology=None):
-        self.vertices = []
+        self.columns = {}
         self.layout = layout and layout or InputLayout()
         self.first = 0
         self.vertex_count = 0
@@ -603,8 +696,9 @@ class VertexBufferGroup(object):
             if match is None:
                 raise Fatal("Cannot determine vertex buffer index from filename %s" % f)
             idx = int(match.group(1))
-            vb = IndividualVertexBuffer(idx, open(f, "r"), self.layout, load_vertices)
-            if vb.vertices:
+            with open(f, "r") as txt:
+                vb = IndividualVertexBuffer(idx, txt, self.layout, load_vertices)
+            if vb.columns:
                 self.vbs.append(vb)
                 self.slots[idx] = vb
 
@@ -617,7 +711,6 @@ class VertexBufferGroup(object):
 
         if load_vertices:
             self.merge_vbs(self.vbs)
-            assert len(self.vertices) == self.vertex_count
 
     def parse_vb_bin(self, files, use_drawcall_range=False):
         for bin_f, fmt_f in files:
@@ -630,9 +723,11 @@ class VertexBufferGroup(object):
                     % bin_f
                 )
                 idx = 0
-            vb = IndividualVertexBuffer(idx, open(fmt_f, "r"), self.layout, False)
-            vb.parse_vb_bin(open(bin_f, "rb"), use_drawcall_range)
-            if vb.vertices:
+            with open(fmt_f, "r") as fmt:
+                vb = IndividualVertexBuffer(idx, fmt, self.layout, False)
+            with open(bin_f, "rb") as buf:
+                vb.parse_vb_bin(buf, use_drawcall_range)
+            if vb.vertex_count:
                 self.vbs.append(vb)
                 self.slots[idx] = vb
 
@@ -644,42 +739,41 @@ class VertexBufferGroup(object):
         self.topology = self.vbs[0].topology
 
         self.merge_vbs(self.vbs)
-        assert len(self.vertices) == self.vertex_count
-
-    def append(self, vertex):
-        self.vertices.append(vertex)
-        self.vertex_count += 1
 
     def remap_blendindices(self, obj, mapping):
         def lookup_vgmap(x):
             vgname = obj.vertex_groups[x].name
             return mapping.get(vgname, mapping.get(x, x))
 
-        for vertex in self.vertices:
-            for semantic in list(vertex):
-                if semantic.startswith("BLENDINDICES"):
-                    vertex["~" + semantic] = vertex[semantic]
-                    vertex[semantic] = tuple(lookup_vgmap(x) for x in vertex[semantic])
+        for semantic in list(self.columns):
+            if semantic.startswith("BLENDINDICES"):
+                indices = self.columns[semantic]
+                self.columns["~" + semantic] = indices
+                # Only look up each distinct vertex group once:
+                unique, inverse = numpy.unique(indices, return_inverse=True)
+                remapped = numpy.array([lookup_vgmap(x) for x in unique.tolist()])
+                self.columns[semantic] = remapped[inverse].reshape(indices.shape)
 
     def revert_blendindices_remap(self):
-        # Significantly faster than doing a deep copy
-        for vertex in self.vertices:
-            for semantic in list(vertex):
-                if semantic.startswith("BLENDINDICES"):
-                    vertex[semantic] = vertex["~" + semantic]
-                    del vertex["~" + semantic]
+        for semantic in list(self.columns):
+            if semantic.startswith("BLENDINDICES"):
+                self.columns[semantic] = self.columns.pop("~" + semantic)
 
     def disable_blendweights(self):
-        for vertex in self.vertices:
-            for semantic in list(vertex):
-                if semantic.startswith("BLENDINDICES"):
-                    vertex[semantic] = (0, 0, 0, 0)
+        for semantic in list(self.columns):
+            if semantic.startswith("BLENDINDICES"):
+                self.columns[semantic] = numpy.zeros_like(self.columns[semantic])
 
     def write(self, output_prefix, strides, operator=None):
         for vbuf_idx, stride in strides.items():
             with open(output_prefix + vbuf_idx, "wb") as output:
-                for vertex in self.vertices:
-                    output.write(self.layout.encode(vertex, vbuf_idx, stride))
+                # Encode and write a chunk of vertices at a time to keep the
+                # memory used for the packed buffer bounded:
+                for start in range(0, len(self), WRITE_CHUNK_SIZE):
+                    buf = self.layout.encode_columns(
+                        self.columns, vbuf_idx, stride, start, start + WRITE_CHUNK_SIZE
+                    )
+                    write_array(output, buf)
 
                 msg = "Wrote %i vertices to %s" % (len(self), output.name)
                 if operator:
@@ -688,16 +782,16 @@ class VertexBufferGroup(object):
                     print(msg)
 
     def __len__(self):
-        return len(self.vertices)
+        return self.vertex_count
 
     def merge_vbs(self, vbs):
-        self.vertices = self.vbs[0].vertices
-        del self.vbs[0].vertices
-        assert len(self.vertices) == self.vertex_count
-        for vb in self.vbs[1:]:
-            assert len(vb.vertices) == self.vertex_count
-            [self.vertices[i].update(vertex) for i, vertex in enumerate(vb.vertices)]
-            del vb.vertices
+        # Each semantic is stored as a single array with one row per vertex,
+        # so merging the slots only needs to collect their columns together:
+        self.columns = {}
+        for vb in vbs:
+            assert vb.vertex_count == self.vertex_count
+            self.columns.update(vb.columns)
+            del vb.columns
 
     def merge(self, other):
         if self.layout != other.layout:
@@ -710,9 +804,10 @@ class VertexBufferGroup(object):
             raise Fatal(
                 "Cannot merge multiple vertex buffers - please check for updates of the 3DMigoto import script, or import each buffer separately"
             )
-        self.vertices.extend(other.vertices[self.vertex_count :])
+        for semantic, data in self.columns.items():
+            extra = other.columns[semantic][self.vertex_count :]
+            self.columns[semantic] = numpy.concatenate((data, extra))
         self.vertex_count = max(self.vertex_count, other.vertex_count)
-        assert len(self.vertices) == self.vertex_count
 
     def wipe_semantic_for_testing(self, semantic, val=0):
         print("WARNING: WIPING %s FOR TESTING PURPOSES!!!" % semantic)
@@ -721,14 +816,11 @@ class VertexBufferGroup(object):
             components = [{"x": 0, "y": 1, "z": 2, "w": 3}[c] for c in components]
         else:
             components = range(4)
-        for vertex in self.vertices:
-            for s in list(vertex):
-                if s == semantic:
-                    v = list(vertex[semantic])
-                    for component in components:
-                        if component < len(v):
-                            v[component] = val
-                    vertex[semantic] = v
+        if semantic in self.columns:
+            data = numpy.array(self.columns[semantic])
+            components = [c for c in components if c < data.shape[1]]
+            data[:, components] = val
+            self.columns[semantic] = data
 
     def flag_invalid_semantics(self):
         # This refactors some of the logic that used to be in import_vertices()
@@ -788,7 +880,8 @@ class VertexBufferGroup(object):
 
 class IndexBuffer(object):
     def __init__(self, *args, load_indices=True):
-        self.faces = []
+        # One row per face, with indices_per_face columns:
+        self.faces = numpy.empty((0, 0), numpy.uint32)
         self.first = 0
         self.index_count = 0
         self.format = "DXGI_FORMAT_UNKNOWN"
@@ -805,7 +898,8 @@ class IndexBuffer(object):
         self.encoder, self.decoder = EncoderDecoder(self.format)
 
     def append(self, face):
-        self.faces.append(face)
+        faces = self.faces.reshape(-1, len(face))
+        self.faces = numpy.concatenate((faces, [face]))
         self.index_count += len(face)
 
     def parse_ib_txt(self, f, load_indices):
@@ -844,25 +938,20 @@ class IndexBuffer(object):
             )
 
     def parse_ib_bin(self, f, use_drawcall_range=False):
-        f.seek(self.offset)
+        numpy_type, _ = format_numpy_type(self.format)
         stride = format_size(self.format)
+        offset, count = self.offset, -1
         if use_drawcall_range:
-            f.seek(self.first * stride, 1)
+            offset += self.first * stride
+            count = self.index_count
         else:
             self.first = 0
 
-        face = []
-        for i in itertools.count():
-            if use_drawcall_range and i == self.index_count:
-                break
-            index = f.read(stride)
-            if not index:
-                break
-            face.append(*self.decoder(index))
-            if len(face) == self.indices_per_face:
-                self.faces.append(tuple(face))
-                face = []
-        assert len(face) == 0, "Index buffer has incomplete face at end of file"
+        indices = map_buffer(f, numpy_type, offset, count)
+        assert (
+            len(indices) % self.indices_per_face == 0
+        ), "Index buffer has incomplete face at end of file"
+        self.faces = numpy.array(indices).reshape(-1, self.indices_per_face)
         self.expand_strips()
 
         if use_drawcall_range:
@@ -882,30 +971,35 @@ class IndexBuffer(object):
             )
 
     def parse_index_data(self, f):
-        for line in map(str.strip, f):
-            face = tuple(map(int, line.split()))
-            assert len(face) == self.indices_per_face
-            self.faces.append(face)
+        numpy_type, _ = format_numpy_type(self.format)
+        data = f.read()
+        indices = numpy.array(list(map(int, data.split())), numpy_type)
+        # Each line holds one face, check they all had the expected number of
+        # indices before reshaping rather than silently re-slicing them:
+        face_count = sum(1 for line in data.splitlines() if line.strip())
+        if len(indices) != face_count * self.indices_per_face:
+            raise Fatal(
+                "Index buffer has %i indices over %i lines, expected %i per line"
+                % (len(indices), face_count, self.indices_per_face)
+            )
+        self.faces = indices.reshape(-1, self.indices_per_face)
         self.expand_strips()
 
     def expand_strips(self):
         if self.topology == "trianglestrip":
             # Every 2nd face has the vertices out of order to keep all faces in the same orientation:
             # https://learn.microsoft.com/en-us/windows/win32/direct3d9/triangle-strips
-            self.faces = [
-                (
-                    self.faces[i - 2][0],
-                    self.faces[i % 2 and i or i - 1][0],
-                    self.faces[i % 2 and i - 1 or i][0],
-                )
-                for i in range(2, len(self.faces))
-            ]
+            # Degenerate faces used to restart the strip are passed through
+            # as-is, and the parity is counted from the start of the strip
+            # regardless of them, same as the GPU does.
+            indices = self.faces[:, 0]
+            faces = numpy.stack((indices[:-2], indices[1:-1], indices[2:]), axis=1)
+            faces[1::2, 1:] = faces[1::2, :0:-1].copy()
+            self.faces = faces
         elif self.topology == "linestrip":
             raise Fatal("linestrip topology conversion is untested")
-            self.faces = [
-                (self.faces[i - 1][0], self.faces[i][0])
-                for i in range(1, len(self.faces))
-            ]
+            indices = self.faces[:, 0]
+            self.faces = numpy.stack((indices[:-1], indices[1:]), axis=1)
 
     def merge(self, other):
         if self.format != other.format:
@@ -914,11 +1008,22 @@ class IndexBuffer(object):
             )
         self.first = min(self.first, other.first)
         self.index_count += other.index_count
-        self.faces.extend(other.faces)
+        # Either side may still be the initial empty array, which has no
+        # meaningful width:
+        faces = [x for x in (self.faces, other.faces) if x.size]
+        if len(faces) == 2 and faces[0].shape[1] != faces[1].shape[1]:
+            raise Fatal(
+                "Index buffers have different numbers of indices per face - ensure they use the same topology"
+            )
+        if faces:
+            dtype = numpy.result_type(self.faces, other.faces)
+            self.faces = numpy.concatenate(faces).astype(dtype, copy=False)
 
     def write(self, output, operator=None):
-        for face in self.faces:
-            output.write(self.encoder(face))
+        numpy_type, _ = format_numpy_type(self.format)
+        for start in range(0, len(self.faces), WRITE_CHUNK_SIZE):
+            chunk = self.faces[start : start + WRITE_CHUNK_SIZE]
+            write_array(output, numpy.ascontiguousarray(chunk, numpy_type))
 
         msg = "Wrote %i indices to %s" % (len(self), output.name)
         if operator:
@@ -1001,14 +1106,17 @@ class FALogFile(object):
         def __init__(self):
             dict.__init__(self, {0: {}})
             self.last_draw_call = 0
+            # Draw calls are only ever added in increasing order, so this
+            # stays sorted and can be searched with bisect:
+            self.draw_calls = [0]
 
         def prev_draw_call(self, draw_call):
-            return max([i for i in self.keys() if i < draw_call])
+            return self.draw_calls[bisect.bisect_left(self.draw_calls, draw_call) - 1]
 
         # def next_draw_call(self, draw_call):
         #    return min([ i for i in self.keys() if i > draw_call ])
         def subsequent_draw_calls(self, draw_call):
-            return [i for i in sorted(self.keys()) if i >= draw_call]
+            return self.draw_calls[bisect.bisect_left(self.draw_calls, draw_call) :]
 
         def __getitem__(self, draw_call):
             if draw_call > self.last_draw_call:
@@ -1016,10 +1124,140 @@ class FALogFile(object):
                     self, draw_call, dict.__getitem__(self, self.last_draw_call).copy()
                 )
                 self.last_draw_call = draw_call
+                self.draw_calls.append(draw_call)
             elif draw_call not in self.keys():
                 return dict.__getitem__(self, self.prev_draw_call(draw_call))
             return dict.__getitem__(self, draw_call)
 
+        def binding_intervals(self, end_draw_call):
+            """
+            Returns a dictionary mapping each resource address to a list of
+            (first draw call, end draw call, slot) tuples covering every range
+            of draw calls it was bound in. The end draw call is exclusive, and
+            resources still bound at the end of the frame use end_draw_call.
+            """
+            intervals = collections.defaultdict(list)
+            bound = {}
+            for draw_call in self.draw_calls:
+                bindings = dict.__getitem__(self, draw_call)
+                for slot, (address, first) in list(bound.items()):
+                    binding = bindings.get(slot)
+                    if binding is None or binding.resource_address != address:
+                        intervals[address].append((first, draw_call, slot))
+                        del bound[slot]
+                for slot, binding in bindings.items():
+                    if slot not in bound:
+                        bound[slot] = (binding.resource_address, draw_call)
+            for slot, (address, first) in bound.items():
+                intervals[address].append((first, end_draw_call, slot))
+            return intervals
+
+        def to_arrays(self):
+            rows = []
+            for draw_call in self.draw_calls:
+                for slot, binding in dict.__getitem__(self, draw_call).items():
+                    view = binding.view_address
+                    rows.append(
+                        (
+                            draw_call,
+                            FALogFile.encode_slot(slot),
+                            -1 if view is None else view,
+                            binding.resource_address,
+                            binding.resource_hash,
+                        )
+                    )
+            draw_calls = numpy.array(self.draw_calls, numpy.int64)
+            return draw_calls, numpy.array(rows, numpy.int64).reshape(-1, 5)
+
+        @classmethod
+        def from_arrays(cls, draw_calls, rows):
+            binding = FALogFile.FALogParserBindResources.FALogResourceBinding
+            sparse_slots = cls()
+            sparse_slots.draw_calls = draw_calls.tolist()
+            sparse_slots.last_draw_call = sparse_slots.draw_calls[-1]
+            starts = numpy.searchsorted(rows[:, 0], draw_calls, "left").tolist()
+            ends = numpy.searchsorted(rows[:, 0], draw_calls, "right").tolist()
+            rows = rows.tolist()
+            for draw_call, start, end in zip(sparse_slots.draw_calls, starts, ends):
+                bindings = {}
+                for _, slot, view, address, resource_hash in rows[start:end]:
+                    slot = FALogFile.decode_slot(slot)
+                    view = None if view == -1 else view
+                    bindings[slot] = binding(slot, view, address, resource_hash)
+                dict.__setitem__(sparse_slots, draw_call, bindings)
+            return sparse_slots
+
+    class LineQueue(object):
+        """
+        Iterates over the lines of the log file while allowing parsers to peek
+        at and consume the following lines, without reading the whole file
+        into memory.
+        """
+
+        def __init__(self, f):
+            self.lines = iter(f)
+            self.next_line = next(self.lines, None)
+
+        def peek(self):
+            return self.next_line
+
+        def popleft(self):
+            line = self.next_line
+            self.next_line = next(self.lines, None)
+            return line
+
+    class IndexedRows(dict):
+        """
+        Dictionary backed by an array of rows sorted by their first column,
+        used when loading from an index file. The rows for a key are only
+        converted to Python objects the first time that key is looked up, and
+        keys with no rows act like a defaultdict.
+        """
+
+        def __init__(self, rows, convert):
+            dict.__init__(self)
+            self.rows = rows
+            self.convert = convert
+
+        def __missing__(self, key):
+            keys = self.rows[:, 0]
+            start = numpy.searchsorted(keys, key, "left")
+            end = numpy.searchsorted(keys, key, "right")
+            value = self.convert(self.rows[start:end].tolist())
+            self[key] = value
+            return value
+
+    class IndexedSlotClasses(dict):
+        """
+        slot_class dictionary used when loading from an index file, which only
+        rebuilds the SparseSlots of a slot class the first time it is used.
+        """
+
+        def __init__(self, arrays, slot_classes):
+            dict.__init__(self, dict.fromkeys(slot_classes))
+            self.arrays = arrays
+
+        def __getitem__(self, slot_class):
+            sparse_slots = dict.__getitem__(self, slot_class)
+            if sparse_slots is None:
+                sparse_slots = FALogFile.SparseSlots.from_arrays(
+                    self.arrays["draw_calls." + slot_class],
+                    self.arrays["slots." + slot_class],
+                )
+                self[slot_class] = sparse_slots
+            return sparse_slots
+
+        def get(self, slot_class, default=None):
+            if slot_class in self:
+                return self[slot_class]
+            return default
+
+        def values(self):
+            return [self[x] for x in self]
+
+        def items(self):
+            return [(x, self[x]) for x in self]
+
     class FALogParser(object):
         """
         Base class implementing some common parsing functions
@@ -1095,10 +1333,11 @@ class FALogFile(object):
                 for i in range(self.num_bindings(api_match)):
                     self.sparse_slots[state.draw_call].pop(start_slot + i, None)
             bindings = self.sparse_slots[state.draw_call]
-            while self.resource_pattern.match(q[0]):
-                # FIXME: Inefficiently calling match twice. I hate that Python
-                # lacks a do/while and every workaround is ugly in some way.
-                resource_match = self.resource_pattern.match(q.popleft())
+            while True:
+                resource_match = self.resource_pattern.match(q.peek() or "")
+                if resource_match is None:
+                    break
+                q.popleft()
                 slot = resource_match.group("slot")
                 if slot.isnumeric():
                     slot = int(slot)
@@ -1200,15 +1439,20 @@ class FALogFile(object):
     #    bind_clears_all_slots = True
     # FALogParserDrawcall.register(FALogParserOMSetRenderTargets)
 
-    def __init__(self, f):
+    # Bump whenever the index file layout changes:
+    INDEX_VERSION = 1
+
+    def __init__(self, f=None):
         self.draw_call = None
         self.slot_class = {}
         self.resource_index = collections.defaultdict(set)
+        # Per slot class lookup of resource address -> bound draw call ranges,
+        # built on first use by find_resource_uses():
+        self.intervals = {}
+        if f is None:
+            return
         draw_call_parser = self.FALogParserDrawcall(self)
-        # Using a deque for a concise way to use a pop iterator and be able to
-        # peek/consume the following line. Maybe overkill, but shorter code
-        q = collections.deque(f)
-        q.append(None)
+        q = self.LineQueue(f)
         for line in iter(q.popleft, None):
             # print(line)
             if not draw_call_parser.parse(line, q, self):
@@ -1219,38 +1463,183 @@ class FALogFile(object):
         """
         Find draw calls + slots where this resource is used.
         """
-        # return [ x for x in sorted(self.resource_index[resource_address]) if x.slot_type == slot_class ]
         ret = set()
-        for bound in sorted(self.resource_index[resource_address]):
-            if slot_class is not None and bound.slot_type != slot_class:
-                continue
-            # Resource was bound in this draw call, but could potentially have
-            # been left bound in subsequent draw calls that we also want to
-            # return, so return a range of draw calls if appropriate:
-            sparse_slots = self.slot_class[bound.slot_type]
-            for sparse_draw_call in sparse_slots.subsequent_draw_calls(bound.draw_call):
-                if (
-                    bound.slot not in sparse_slots[sparse_draw_call]
-                    or sparse_slots[sparse_draw_call][bound.slot].resource_address
-                    != resource_address
-                ):
-                    # print('x', sparse_draw_call, sparse_slots[sparse_draw_call][bound.slot])
-                    for draw_call in range(bound.draw_call, sparse_draw_call):
-                        ret.add(
-                            FALogFile.ResourceUse(
-                                draw_call, bound.slot_type, bound.slot
-                            )
-                        )
-                    break
-                # print('y', sparse_draw_call, sparse_slots[sparse_draw_call][bound.slot])
-            else:
-                # I love Python's for/else clause. Means we didn't hit the
-                # above break so the resource was still bound at end of frame
-                for draw_call in range(bound.draw_call, self.draw_call):
-                    ret.add(
-                        FALogFile.ResourceUse(draw_call, bound.slot_type, bound.slot)
-                    )
+        if slot_class is None:
+            slot_classes = self.slot_class
+        else:
+            slot_classes = [slot_class]
+        for slot_type in slot_classes:
+            # Resource may have been left bound in subsequent draw calls that
+            # we also want to return, so each binding covers a range:
+            intervals = self.binding_intervals(slot_type)
+            for first, end, slot in intervals[resource_address]:
+                for draw_call in range(first, end):
+                    ret.add(FALogFile.ResourceUse(draw_call, slot_type, slot))
         return ret
 
+    def binding_intervals(self, slot_class):
+        if slot_class not in self.intervals:
+            if slot_class not in self.slot_class:
+                return collections.defaultdict(list)
+            sparse_slots = self.slot_class[slot_class]
+            intervals = sparse_slots.binding_intervals(self.draw_call)
+            self.intervals[slot_class] = intervals
+        return self.intervals[slot_class]
+
+    # Depth slots are named "D" rather than numbered:
+    @staticmethod
+    def encode_slot(slot):
+        return -1 if slot == "D" else slot
+
+    @staticmethod
+    def decode_slot(slot):
+        return "D" if slot == -1 else slot
+
+    def save_index(self, f, size, mtime):
+        """
+        Saves the resource index and binding state to a binary index file,
+        which load_index() can use in place of re-parsing the log file as long
+        as its size and mtime still match.
+        """
+        slot_classes = sorted(self.slot_class)
+        meta = {
+            "version": self.INDEX_VERSION,
+            "size": size,
+            "mtime": mtime,
+            "draw_call": self.draw_call,
+            "slot_classes": slot_classes,
+        }
+        arrays = {"meta": numpy.array(json.dumps(meta))}
+        rows = [
+            (
+                address,
+                use.draw_call,
+                slot_classes.index(use.slot_type),
+                self.encode_slot(use.slot),
+            )
+            for address, uses in self.resource_index.items()
+            for use in uses
+        ]
+        arrays["resource_index"] = numpy.array(sorted(rows), numpy.int64).reshape(-1, 4)
+        for slot_class in slot_classes:
+            rows = [
+                (address, first, end, self.encode_slot(slot))
+                for address, intervals in self.binding_intervals(slot_class).items()
+                for first, end, slot in intervals
+            ]
+            rows = numpy.array(sorted(rows), numpy.int64).reshape(-1, 4)
+            arrays["intervals." + slot_class] = rows
+            draw_calls, rows = self.slot_class[slot_class].to_arrays()
+            arrays["draw_calls." + slot_class] = draw_calls
+            arrays["slots." + slot_class] = rows
+        numpy.savez(f, **arrays)
+
+    @classmethod
+    def load_index(cls, f, size, mtime):
+        """
+        Loads a log file from an index created by save_index(). Returns None if
+        the index is out of date.
+        """
+        with numpy.load(f, allow_pickle=False) as npz:
+            arrays = {x: npz[x] for x in npz.files}
+        meta = json.loads(str(arrays["meta"]))
+        if (meta["version"], meta["size"], meta["mtime"]) != (
+            cls.INDEX_VERSION,
+            size,
+            mtime,
+        ):
+            return None
+
+        slot_classes = meta["slot_classes"]
+
+        def resource_uses(rows):
+            return {
+                cls.ResourceUse(draw_call, slot_classes[i], cls.decode_slot(slot))
+                for _, draw_call, i, slot in rows
+            }
+
+        def intervals(rows):
+            return [(first, end, cls.decode_slot(slot)) for _, first, end, slot in rows]
+
+        log = cls()
+        log.draw_call = meta["draw_call"]
+        log.slot_class = cls.IndexedSlotClasses(arrays, slot_classes)
+        log.resource_index = cls.IndexedRows(arrays["resource_index"], resource_uses)
+        log.intervals = {
+            x: cls.IndexedRows(arrays["intervals." + x], intervals)
+            for x in slot_classes
+        }
+        return log
+
 
 VBSOMapEntry = collections.namedtuple("VBSOMapEntry", ["draw_call", "slot"])
+
+
+class FrameAnalysisDirectory(object):
+    """
+    Index of the files in a frame analysis dump directory, built with a single
+    scan so related buffers can be looked up by filename instead of globbing
+    the directory again for every file, slot and draw call.
+    """
+
+    buffer_pattern = re.compile(
+        r"""-(?:ib|vb[0-9]+)(?P<hash>=[0-9a-f]+)?(?=[^0-9a-f=])"""
+    )
+
+    def __init__(self, dirname):
+        self.dirname = dirname
+        self.names = set()
+        # "-vb0=hash" -> .txt files that buffer was dumped to:
+        self.buffers = collections.defaultdict(list)
+        # (text before buffer, "ib" or "vb", text after buffer) -> files:
+        self.draw_call_buffers = collections.defaultdict(list)
+        # Text before the first "-", usually the draw call number -> files:
+        self.prefixes = collections.defaultdict(list)
+        with os.scandir(dirname) as it:
+            for entry in it:
+                if entry.is_file():
+                    self.add(entry.name)
+        for index in (self.buffers, self.draw_call_buffers, self.prefixes):
+            for names in index.values():
+                names.sort()
+
+    def add(self, name):
+        self.names.add(name)
+        self.prefixes[name.split("-", 1)[0]].append(name)
+        for match in self.buffer_pattern.finditer(name):
+            kind = match.group()[1:3]
+            key = (name[: match.start()], kind, name[match.end() :])
+            self.draw_call_buffers[key].append(name)
+            if name.endswith(".txt"):
+                self.buffers[match.group()].append(name)
+
+    def path(self, name):
+        return os.path.join(self.dirname, name)
+
+    def exists(self, name):
+        return name in self.names
+
+    def buffer_dumps(self, buffer):
+        """
+        .txt files a given buffer (e.g. "-vb0=hash") was dumped to in any draw
+        call. Equivalent to globbing "*<buffer>*.txt".
+        """
+        return self.buffers.get(buffer, [])
+
+    def related_buffers(self, filename, match, kind):
+        """
+        Index or vertex buffers dumped alongside filename from the same draw
+        call, where match is the buffer_pattern match for filename. Equivalent
+        to globbing "<before>-ib*<after>" / "<before>-vb*<after>".
+        """
+        key = (filename[: match.start()], kind, filename[match.end() :])
+        return list(self.draw_call_buffers.get(key, []))
+
+    def draw_call_files(self, prefix):
+        """
+        Files with names starting with prefix, which is normally the zero
+        padded draw call number.
+        """
+        if "-" in prefix:
+            return sorted(x for x in self.names if x.startswith(prefix))
+        return list(self.prefixes.get(prefix, []))
@@ -1,6 +1,5 @@
 import itertools
 import os
-import struct
 
 import re
 import numpy
@@ -25,6 +24,7 @@ from bpy_extras.io_utils import (
     axis_conversion,
 )
 
+from .datacache import CACHE_DIR_NAME, ParseCache
 from .datahandling import (
     find_stream_output_vertex_buffers,
     open_frame_analysis_log_file,
@@ -36,6 +36,7 @@ from .datahandling import (
 )
 from .datastructures import (
     Fatal,
+    FrameAnalysisDirectory,
     ImportPaths,
     IOOBJOrientationHelper,
     VBSOMapEntry,
@@ -43,6 +44,8 @@ from .datastructures import (
     IndexBuffer,
     vertex_color_layer_channels,
 )
+from .vertexgroups import add_vertex_group_weights
+from .data.data_model import DataModel
 
 class XXMIProperties(PropertyGroup):
     """Properties for XXMITools"""
@@ -60,12 +63,18 @@ class XXMIProperties(PropertyGroup):
         default="",
         maxlen=1024,
     ) #type: ignore
+
+    tangent_uvmap: StringProperty(
+        name="Tangent UV Map",
+        description="UV map to calculate tangents with on export, passed to DataModelXXMI.from_obj",
+        default=DataModel.tangent_uvmap,
+    ) #type: ignore
     filter_glob: StringProperty(
         default="*.vb*",
         options={"HIDDEN"},
     ) #type: ignore
 
-def load_3dmigoto_mesh_bin(operator: Operator, vb_paths, ib_paths, pose_path):
+def load_3dmigoto_mesh_bin(operator: Operator, vb_paths, ib_paths):
     if len(vb_paths) != 1 or len(ib_paths) > 1:
         raise Fatal("Cannot merge meshes loaded from binary files")
 
@@ -82,28 +91,16 @@ def load_3dmigoto_mesh_bin(operator: Operator, vb_paths, ib_paths, pose_path):
 
     ib = None
     if ib_bin_path:
-        ib = IndexBuffer(open(ib_txt_path, "r"), load_indices=False)
-        if ib.used_in_drawcall is False:
-            operator.report(
-                {"WARNING"},
-                "{}: Discarding index buffer not used in draw call".format(
-                    os.path.basename(ib_bin_path)
-                ),
-            )
-            ib = None
-        else:
-            ib.parse_ib_bin(open(ib_bin_path, "rb"), use_drawcall_range)
-
-    return vb, ib, os.path.basename(vb_paths[0][0][0]), pose_path
+        with open(ib_txt_path, "r") as f:
+            ib = IndexBuffer(f, load_indices=False)
+        if ib.used_in_drawcall is not False:
+            with open(ib_bin_path, "rb") as f:
+                ib.parse_ib_bin(f, use_drawcall_range)
 
+    return vb, ib
 
-def load_3dmigoto_mesh(operator: Operator, paths: ImportPaths):
-    vb_paths, ib_paths, use_bin, pose_path = zip(*paths)
-    pose_path = pose_path[0]
-
-    if use_bin[0]:
-        return load_3dmigoto_mesh_bin(operator, vb_paths, ib_paths, pose_path)
 
+def load_3dmigoto_mesh_txt(operator: Operator, vb_paths, ib_paths):
     vb = VertexBufferGroup(vb_paths[0])
     # Merge additional vertex buffers for meshes split over multiple draw calls:
     for vb_path in vb_paths[1:]:
@@ -120,21 +117,79 @@ def load_3dmigoto_mesh(operator: Operator, paths: ImportPaths):
 
     ib = None
     if ib_paths and ib_paths != (None,):
-        ib = IndexBuffer(open(ib_paths[0], "r"))
+        with open(ib_paths[0], "r") as f:
+            ib = IndexBuffer(f)
         # Merge additional vertex buffers for meshes split over multiple draw calls:
         for ib_path in ib_paths[1:]:
-            tmp = IndexBuffer(open(ib_path, "r"))
+            with open(ib_path, "r") as f:
+                tmp = IndexBuffer(f)
             ib.merge(tmp)
-        if ib.used_in_drawcall is False:
-            operator.report(
-                {"WARNING"},
-                "{}: Discarding index buffer not used in draw call".format(
-                    os.path.basename(ib_paths[0])
-                ),
-            )
-            ib = None
 
-    return vb, ib, os.path.basename(vb_paths[0][0]), pose_path
+    return vb, ib
+
+
+def open_parse_cache(operator: Operator, paths: ImportPaths):
+    # Only frame analysis imports have the cache options:
+    if not getattr(operator, "use_parse_cache", False):
+        return None, None
+
+    def flatten(paths):
+        for path in paths:
+            if isinstance(path, (tuple, list)):
+                yield from flatten(path)
+            elif path:
+                yield path
+
+    files = list(flatten((x.vb_paths, x.ib_paths) for x in paths))
+    cache_dir = operator.parse_cache_dir
+    if not cache_dir:
+        cache_dir = os.path.join(os.path.dirname(files[0]), CACHE_DIR_NAME)
+    cache = ParseCache(
+        bpy.path.abspath(cache_dir), operator.parse_cache_size * 1024 * 1024
+    )
+    try:
+        key = cache.key(
+            files,
+            load_buf=paths[0].use_bin,
+            load_buf_limit_range=operator.load_buf_limit_range,
+        )
+    except OSError:
+        return None, None
+    return cache, key
+
+
+def load_3dmigoto_mesh(operator: Operator, paths: ImportPaths):
+    vb_paths, ib_paths, use_bin, pose_path = zip(*paths)
+    pose_path = pose_path[0]
+
+    cache, key = open_parse_cache(operator, paths)
+    cached = cache and cache.load(key)
+    if cached:
+        vb, ib = cached
+    elif use_bin[0]:
+        vb, ib = load_3dmigoto_mesh_bin(operator, vb_paths, ib_paths)
+    else:
+        vb, ib = load_3dmigoto_mesh_txt(operator, vb_paths, ib_paths)
+    if cache and not cached:
+        cache.store(key, vb, ib)
+
+    if use_bin[0]:
+        name = os.path.basename(vb_paths[0][0][0])
+        ib_path = ib_paths[0][0]
+    else:
+        name = os.path.basename(vb_paths[0][0])
+        ib_path = ib_paths[0]
+
+    if ib is not None and ib.used_in_drawcall is False:
+        operator.report(
+            {"WARNING"},
+            "{}: Discarding index buffer not used in draw call".format(
+                os.path.basename(ib_path)
+            ),
+        )
+        ib = None
+
+    return vb, ib, name, pose_path
 
 
 def normal_import_translation(elem, flip):
@@ -161,16 +216,20 @@ def import_normals_step1(
 ):
     # Ensure normals are 3-dimensional:
     # XXX: Assertion triggers in DOA6
-    if len(data[0]) == 4:
-        if [x[3] for x in data] != [0.0] * len(data):
+    if data.shape[1] == 4:
+        if numpy.any(data[:, 3] != 0.0):
             # raise Fatal('Normals are 4D')
             operator.report(
                 {"WARNING"},
                 "Normals are 4D, storing W coordinate in NORMAL.w vertex layer. Beware that some types of edits on this mesh may be problematic.",
             )
-            vertex_layers["NORMAL.w"] = [[x[3]] for x in data]
-    normals = [tuple(map(translate_normal, (x[0], x[1], x[2]))) for x in data]
-    normals = [(-(2 * flip_mesh - 1) * x[0], x[1], x[2]) for x in normals]
+            vertex_layers["NORMAL.w"] = data[:, 3:4]
+    # The translation works element-wise, so apply it to the whole array at
+    # once. Do it in double precision, as it was when applied to one Python
+    # float at a time, and only round to float32 for Blender at the end:
+    normals = translate_normal(numpy.array(data[:, :3], dtype=numpy.float64))
+    normals[:, 0] *= -(2 * flip_mesh - 1)
+    normals = numpy.ascontiguousarray(normals, dtype=numpy.float32)
     # To make sure the normals don't get lost by Blender's edit mode,
     # or mesh.update() we need to set custom normals in the loops, not
     # vertices.
@@ -186,8 +245,9 @@ def import_normals_step1(
     if bpy.app.version >= (4, 1):
         return normals
     mesh.create_normals_split()
-    for loop in mesh.loops:
-        loop.normal[:] = normals[loop.vertex_index]
+    loop_vertices = numpy.empty(len(mesh.loops), dtype=numpy.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vertices)
+    mesh.loops.foreach_set("normal", normals[loop_vertices].ravel())
     return []
 
 
@@ -198,8 +258,8 @@ def import_normals_step2(mesh: Mesh, flip_mesh: bool):
     clnors[:, 0] *= -(2 * flip_mesh - 1)
     # Not sure this is still required with use_auto_smooth, but the other
     # importers do it, and at the very least it shouldn't hurt...
-    mesh.polygons.foreach_set("use_smooth", [True] * len(mesh.polygons))
-    mesh.normals_split_custom_set(clnors.tolist())
+    mesh.polygons.foreach_set("use_smooth", numpy.ones(len(mesh.polygons), bool))
+    mesh.normals_split_custom_set(clnors)
     mesh.use_auto_smooth = (
         True  # This has a double meaning, one of which is to use the custom normals
     )
@@ -216,7 +276,7 @@ def import_vertex_groups(mesh: Mesh, obj: Object, blend_indices, blend_weights):
         if len(blend_weights) == 0:
             # If no blend weights are provided, assume uniform weights
             blend_weights = {
-                sem_idx: [[1] * len(verts[0])] * len(verts)
+                sem_idx: numpy.ones(numpy.shape(verts), numpy.float32)
                 for sem_idx, verts in blend_indices.items()
             }
         # We will need to make sure we re-export the same blend indices later -
@@ -224,28 +284,34 @@ def import_vertex_groups(mesh: Mesh, obj: Object, blend_indices, blend_weights):
         # to use the vertex group index, vertex group name or attach some extra
         # data. Make sure the indices and names match:
         num_vertex_groups = (
-            max(itertools.chain(*itertools.chain(*blend_indices.values()))) + 1
+            max(
+                (int(numpy.max(x)) for x in blend_indices.values() if numpy.size(x)),
+                default=-1,
+            )
+            + 1
         )
         for i in range(num_vertex_groups):
             obj.vertex_groups.new(name=str(i))
-        for vertex in mesh.vertices:
-            for semantic_index in sorted(blend_indices.keys()):
-                for i, w in zip(
-                    blend_indices[semantic_index][vertex.index],
-                    blend_weights[semantic_index][vertex.index],
-                ):
-                    if w == 0.0:
-                        continue
-                    obj.vertex_groups[i].add((vertex.index,), w, "REPLACE")
+        semantics = sorted(blend_indices.keys())
+        add_vertex_group_weights(
+            obj,
+            [blend_indices[i] for i in semantics],
+            [blend_weights[i] for i in semantics],
+        )
 
 
 def import_uv_layers(mesh: Mesh, obj: Object, texcoords, flip_texcoord_v: bool):
+    # Look up which vertex each loop uses once, and share it between layers:
+    loop_vertices = numpy.empty(len(mesh.loops), dtype=numpy.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vertices)
+
     for texcoord, data in sorted(texcoords.items()):
+        data = numpy.asarray(data, dtype=numpy.float64)
         # TEXCOORDS can have up to four components, but UVs can only have two
         # dimensions. Not positive of the best way to handle this in general,
         # but for now I'm thinking that splitting the TEXCOORD into two sets of
         # UV coordinates might work:
-        dim = len(data[0])
+        dim = data.shape[1]
         if dim == 4:
             components_list = ("xy", "zw")
         elif dim == 3:
@@ -278,27 +344,29 @@ def import_uv_layers(mesh: Mesh, obj: Object, texcoords, flip_texcoord_v: bool):
             #    for i in range(len(mesh.polygons)):
             #        mesh.uv_textures[uv_layer].data[i].image = image
 
+            uvs = numpy.zeros((len(loop_vertices), 2), dtype=numpy.float32)
+            columns = [cmap[c] for c in components]
             # Can't find an easy way to flip the display of V in Blender, so
             # add an option to flip it on import & export:
             if len(components) % 2 == 1:
                 # 1D or 3D TEXCOORD, save in a UV layer with V=0
-                translate_uv = lambda u: (u[0], 0)
-            elif flip_texcoord_v:
-                translate_uv = lambda uv: (uv[0], 1.0 - uv[1])
-                # Record that V was flipped so we know to undo it when exporting:
-                obj["3DMigoto:" + uv_name] = {"flip_v": True}
+                uvs[:, 0] = data[loop_vertices, columns[0]]
             else:
-                translate_uv = lambda uv: uv
+                uvs[:] = data[:, columns][loop_vertices]
+                if flip_texcoord_v:
+                    # Flip in double precision so V is only rounded to float32 once:
+                    uvs[:, 1] = 1.0 - data[loop_vertices, columns[1]]
+                    # Record that V was flipped so we know to undo it when exporting:
+                    obj["3DMigoto:" + uv_name] = {"flip_v": True}
 
-            uvs = [[d[cmap[c]] for c in components] for d in data]
-            for loop in mesh.loops:
-                blender_uvs.data[loop.index].uv = translate_uv(uvs[loop.vertex_index])
+            blender_uvs.data.foreach_set("uv", uvs.ravel())
 
 
 # This loads unknown data from the vertex buffers as vertex layers
 def import_vertex_layers(mesh: Mesh, obj: Object, vertex_layers):
     for element_name, data in sorted(vertex_layers.items()):
-        dim = len(data[0])
+        data = numpy.asarray(data)
+        dim = data.shape[1]
         cmap = {0: "x", 1: "y", 2: "z", 3: "w"}
         for component in range(dim):
             if dim != 1 or element_name.find(".") == -1:
@@ -306,43 +374,41 @@ def import_vertex_layers(mesh: Mesh, obj: Object, vertex_layers):
             else:
                 layer_name = element_name
 
-            if type(data[0][0]) is int:
+            if data.dtype.kind in "iu":
                 layer = new_custom_attribute_int(mesh, layer_name)
-                for v in mesh.vertices:
-                    val = data[v.index][component]
-                    # Blender integer layers are 32bit signed and will throw an
-                    # exception if we are assigning an unsigned value that
-                    # can't fit in that range. Reinterpret as signed if necessary:
-                    if val < 0x80000000:
-                        layer.data[v.index].value = val
-                    else:
-                        layer.data[v.index].value = struct.unpack(
-                            "i", struct.pack("I", val)
-                        )[0]
-            elif type(data[0][0]) is float:
+                # Blender integer layers are 32bit signed and will throw an
+                # exception if we are assigning an unsigned value that can't
+                # fit in that range. Reinterpret as signed - negative values
+                # survive the round trip through uint32 unchanged:
+                values = data[:, component].astype(numpy.uint32).view(numpy.int32)
+                layer.data.foreach_set("value", values)
+            elif data.dtype.kind == "f":
                 layer = new_custom_attribute_float(mesh, layer_name)
-                for v in mesh.vertices:
-                    layer.data[v.index].value = data[v.index][component]
+                values = data[:, component].astype(numpy.float32)
+                layer.data.foreach_set("value", values)
             else:
-                raise Fatal("BUG: Bad layer type %s" % type(data[0][0]))
+                raise Fatal("BUG: Bad layer type %s" % data.dtype)
 
 
 def import_faces_from_ib(mesh: Mesh, ib: IndexBuffer, flip_winding: bool):
-    mesh.loops.add(len(ib.faces) * 3)
-    mesh.polygons.add(len(ib.faces))
-    if flip_winding:
-        mesh.loops.foreach_set("vertex_index", unpack_list(map(reversed, ib.faces)))
-    else:
-        mesh.loops.foreach_set("vertex_index", unpack_list(ib.faces))
-    mesh.polygons.foreach_set("loop_start", [x * 3 for x in range(len(ib.faces))])
-    mesh.polygons.foreach_set("loop_total", [3] * len(ib.faces))
+    num_faces = len(ib.faces)
+    mesh.loops.add(num_faces * 3)
+    mesh.polygons.add(num_faces)
+    faces = ib.faces[:, ::-1] if flip_winding else ib.faces
+    # foreach_set can only take the fast path with a matching buffer type:
+    indices = numpy.ascontiguousarray(faces, dtype=numpy.int32).ravel()
+    mesh.loops.foreach_set("vertex_index", indices)
+    mesh.polygons.foreach_set(
+        "loop_start", numpy.arange(0, num_faces * 3, 3, dtype=numpy.int32)
+    )
+    mesh.polygons.foreach_set("loop_total", numpy.full(num_faces, 3, numpy.int32))
 
 
 def import_faces_from_vb_trianglelist(
     mesh: Mesh, vb: VertexBufferGroup, flip_winding: bool
 ):
     # Only lightly tested
-    num_faces = len(vb.vertices) // 3
+    num_faces = len(vb) // 3
     mesh.loops.add(num_faces * 3)
     mesh.polygons.add(num_faces)
     if flip_winding:
@@ -366,7 +432,7 @@ def import_faces_from_vb_trianglestrip(
         raise Fatal(
             "Flipping winding order with triangle strip topology is not implemented"
         )
-    num_faces = len(vb.vertices) - 2
+    num_faces = len(vb) - 2
     if num_faces <= 0:
         raise Fatal("Insufficient vertices in trianglestrip")
     mesh.loops.add(num_faces * 3)
@@ -388,6 +454,27 @@ def import_faces_from_vb_trianglestrip(
     mesh.polygons.foreach_set("loop_total", [3] * num_faces)
 
 
+def import_vertex_colors(mesh: Mesh, name: str, data, loop_vertices):
+    data = numpy.asarray(data, dtype=numpy.float32)
+    c = vertex_color_layer_channels
+    # Expand the per-vertex colours to one per loop in a single fancy index,
+    # zero padding any missing channels to the width of the colour layer:
+    colors = numpy.zeros((len(loop_vertices), c), dtype=numpy.float32)
+    if data.shape[1] <= 3 or c == 4:
+        mesh.vertex_colors.new(name=name)
+        colors[:, : data.shape[1]] = data[loop_vertices]
+        mesh.vertex_colors[name].data.foreach_set("color", colors.ravel())
+    else:
+        mesh.vertex_colors.new(name=name + ".RGB")
+        mesh.vertex_colors.new(name=name + ".A")
+        data = data[loop_vertices]
+        colors[:] = data[:, :3]
+        mesh.vertex_colors[name + ".RGB"].data.foreach_set("color", colors.ravel())
+        colors[:] = 0
+        colors[:, 0] = data[:, 3]
+        mesh.vertex_colors[name + ".A"].data.foreach_set("color", colors.ravel())
+
+
 def import_vertices(
     mesh: Mesh,
     obj: Object,
@@ -396,7 +483,7 @@ def import_vertices(
     flip_normal: bool = False,
     flip_mesh: bool = False,
 ):
-    mesh.vertices.add(len(vb.vertices))
+    mesh.vertices.add(len(vb))
 
     blend_indices = {}
     blend_weights = {}
@@ -404,6 +491,7 @@ def import_vertices(
     vertex_layers = {}
     use_normals = False
     normals = []
+    loop_vertices = None
 
     for elem in vb.layout:
         if elem.InputSlotClass != "per-vertex" or elem.reused_offset:
@@ -415,38 +503,33 @@ def import_vertices(
                 % (elem.name, elem.InputSlot)
             )
             continue
+        if elem.name not in vb.columns:
+            print(
+                "NOTICE: Vertex semantic %s has no data in vb%i"
+                % (elem.name, elem.InputSlot)
+            )
+            continue
 
         elem_name = elem.name.upper()
         elem_index = elem.SemanticIndex
 
-        data = tuple(x[elem.name] for x in vb.vertices)
+        data = vb.columns[elem.name]
         if elem_name == "POSITION":
-            if len(data[0]) == 4:
-                if [x[3] for x in data] != [1.0] * len(data):
+            if data.shape[1] == 4:
+                if numpy.any(data[:, 3] != 1.0):
                     operator.report(
                         {"WARNING"},
                         "Positions are 4D, storing W coordinate in POSITION.w vertex layer. Beware that some types of edits on this mesh may be problematic.",
                     )
-                    vertex_layers["POSITION.w"] = [[x[3]] for x in data]
-            positions = [(-(2 * flip_mesh - 1) * x[0], x[1], x[2]) for x in data]
-            mesh.vertices.foreach_set("co", unpack_list(positions))
+                    vertex_layers["POSITION.w"] = data[:, 3:4]
+            positions = numpy.array(data[:, :3], dtype=numpy.float32)
+            positions[:, 0] *= -(2 * flip_mesh - 1)
+            mesh.vertices.foreach_set("co", positions.ravel())
         elif elem_name.startswith("COLOR"):
-            if len(data[0]) <= 3 or vertex_color_layer_channels == 4:
-                mesh.vertex_colors.new(name=elem.name)
-                color_layer = mesh.vertex_colors[elem.name].data
-                c = vertex_color_layer_channels
-                for loop in mesh.loops:
-                    color_layer[loop.index].color = list(data[loop.vertex_index]) + [
-                        0
-                    ] * (c - len(data[loop.vertex_index]))
-            else:
-                mesh.vertex_colors.new(name=elem.name + ".RGB")
-                mesh.vertex_colors.new(name=elem.name + ".A")
-                color_layer = mesh.vertex_colors[elem.name + ".RGB"].data
-                alpha_layer = mesh.vertex_colors[elem.name + ".A"].data
-                for loop in mesh.loops:
-                    color_layer[loop.index].color = data[loop.vertex_index][:3]
-                    alpha_layer[loop.index].color = [data[loop.vertex_index][3], 0, 0]
+            if loop_vertices is None:
+                loop_vertices = numpy.empty(len(mesh.loops), dtype=numpy.int32)
+                mesh.loops.foreach_get("vertex_index", loop_vertices)
+            import_vertex_colors(mesh, elem.name, data, loop_vertices)
         elif elem_name == "NORMAL":
             use_normals = True
             translate_normal = normal_import_translation(elem, flip_normal)
@@ -728,6 +811,26 @@ class QuickImportXXMIFrameAnalysis(bpy.types.Operator, ImportHelper, IOOBJOrient
         default=False,
     )
 
+    use_parse_cache: BoolProperty(
+        name="Cache parsed buffers",
+        description="Store the parsed vertex and index buffers on disk so importing the same dump again skips parsing. Entries are invalidated automatically when the dump files change",
+        default=False,
+    )
+
+    parse_cache_dir: StringProperty(
+        name="Cache directory",
+        description="Where to store the parsed buffer cache. Leave blank to use a %s folder next to the dump" % CACHE_DIR_NAME,
+        default="",
+        subtype="DIR_PATH",
+    )
+
+    parse_cache_size: bpy.props.IntProperty(
+        name="Cache size limit (MB)",
+        description="Least recently used cache entries are removed once the cache directory grows past this size",
+        default=512,
+        min=0,
+    )
+
     merge_meshes: BoolProperty(
         name="Merge meshes together",
         description="Merge all selected meshes together into one object. Meshes must be related",
@@ -771,14 +874,15 @@ class QuickImportXXMIFrameAnalysis(bpy.types.Operator, ImportHelper, IOOBJOrient
     )
 
     def get_vb_ib_paths(self, load_related=None):
-        buffer_pattern = re.compile(
-            r"""-(?:ib|vb[0-9]+)(?P<hash>=[0-9a-f]+)?(?=[^0-9a-f=])"""
-        )
+        buffer_pattern = FrameAnalysisDirectory.buffer_pattern
         vb_regex = re.compile(
             r"""^(?P<draw_call>[0-9]+)-vb(?P<slot>[0-9]+)="""
         )  # TODO: Combine with above? (careful not to break hold type frame analysis)
 
         dirname = os.path.dirname(self.filepath)
+        # Scan the dump directory once up front, as dumps can contain tens of
+        # thousands of files and we would otherwise glob it many times over:
+        dump = FrameAnalysisDirectory(dirname)
         ret = set()
         if load_related is None:
             load_related = self.load_related
@@ -801,19 +905,14 @@ class QuickImportXXMIFrameAnalysis(bpy.types.Operator, ImportHelper, IOOBJOrient
                 match = buffer_pattern.search(filename.name)
                 if match is None or not match.group("hash"):
                     continue
-                paths = glob(
-                    os.path.join(
-                        dirname, "*%s*.txt" % filename.name[match.start() : match.end()]
-                    )
-                )
-                files.update([os.path.basename(x) for x in paths])
+                files.update(dump.buffer_dumps(match.group()))
         if not files:
             files = [x.name for x in self.files]
             if files == [""]:
                 raise Fatal("No files selected")
 
         done = set()
-        for filename in files:
+        for filename in sorted(files):
             if filename in done:
                 continue
             match = buffer_pattern.search(filename)
@@ -848,11 +947,11 @@ class QuickImportXXMIFrameAnalysis(bpy.types.Operator, ImportHelper, IOOBJOrient
                 )
                 use_bin = True  # FIXME: Ask
 
-            ib_pattern = filename[: match.start()] + "-ib*" + filename[match.end() :]
-            vb_pattern = filename[: match.start()] + "-vb*" + filename[match.end() :]
-            ib_paths = glob(os.path.join(dirname, ib_pattern))
-            vb_paths = glob(os.path.join(dirname, vb_pattern))
-            done.update(map(os.path.basename, itertools.chain(vb_paths, ib_paths)))
+            ib_names = dump.related_buffers(filename, match, "ib")
+            vb_names = dump.related_buffers(filename, match, "vb")
+            done.update(ib_names, vb_names)
+            ib_paths = list(map(dump.path, ib_names))
+            vb_paths = list(map(dump.path, vb_names))
 
             if vb_so_map:
                 vb_so_paths = set()
@@ -865,8 +964,14 @@ class QuickImportXXMIFrameAnalysis(bpy.types.Operator, ImportHelper, IOOBJOrient
                             # No particularly good way to determine which input
                             # vertex buffers we need from the stream-output
                             # pass, so for now add them all:
-                            vb_so_pattern = f"{so.draw_call:06}-vb*.txt"
-                            glob_result = glob(os.path.join(dirname, vb_so_pattern))
+                            vb_so_prefix = f"{so.draw_call:06}"
+                            vb_so_pattern = f"{vb_so_prefix}-vb*.txt"
+                            glob_result = [
+                                dump.path(x)
+                                for x in dump.draw_call_files(vb_so_prefix)
+                                if x.startswith(vb_so_prefix + "-vb")
+                                and x.endswith(".txt")
+                            ]
                             if not glob_result:
                                 self.report(
                                     {"WARNING"},
@@ -884,7 +989,7 @@ class QuickImportXXMIFrameAnalysis(bpy.types.Operator, ImportHelper, IOOBJOrient
                 ib_bin_paths = [os.path.splitext(x)[0] + ".buf" for x in ib_paths]
                 if all(
                     [
-                        os.path.exists(x)
+                        dump.exists(os.path.basename(x))
                         for x in itertools.chain(vb_bin_paths, ib_bin_paths)
                     ]
                 ):
@@ -901,13 +1006,12 @@ class QuickImportXXMIFrameAnalysis(bpy.types.Operator, ImportHelper, IOOBJOrient
 
             pose_path = None
             if self.pose_cb:
-                pose_pattern = (
-                    filename[: match.start()] + "*-" + self.pose_cb + "=*.txt"
-                )
-                try:
-                    pose_path = glob(os.path.join(dirname, pose_pattern))[0]
-                except IndexError:
-                    pass
+                prefix = filename[: match.start()]
+                pose_infix = "-" + self.pose_cb + "="
+                for name in dump.draw_call_files(prefix):
+                    if pose_infix in name[len(prefix) :] and name.endswith(".txt"):
+                        pose_path = dump.path(name)
+                        break
 
             if len(ib_paths) > 1:
                 raise Fatal("Error: excess index buffers in dump?")
@@ -950,6 +1054,9 @@ class QuickImportXXMIFrameAnalysis(bpy.types.Operator, ImportHelper, IOOBJOrient
                     "load_buf",
                     "pose_cb",
                     "load_buf_limit_range",
+                    "use_parse_cache",
+                    "parse_cache_dir",
+                    "parse_cache_size",
                 )
             )
             paths = self.get_vb_ib_paths()
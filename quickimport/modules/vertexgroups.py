@@ -0,0 +1,81 @@
+import numpy
+
+
+def add_vertex_group_weights(obj, blend_indices, blend_weights):
+    """
+    Adds the vertices to their vertex groups with one VertexGroup.add() call
+    per distinct weight of each group, instead of one call per vertex. The
+    result is the same as walking the vertices in order and adding each
+    non-zero (index, weight) pair with REPLACE. That includes the order each
+    vertex's groups are listed in, which exporters that stable sort by weight
+    depend on.
+
+    blend_indices and blend_weights are lists of per-vertex arrays, one per
+    BLENDINDICES / BLENDWEIGHT semantic in the order they should be applied.
+    The vertex groups of the Blender object obj must already exist.
+    """
+    indices = []
+    weights = []
+    for idx, w in zip(blend_indices, blend_weights):
+        if len(idx) == 0 or len(w) == 0:
+            # Empty mesh or column, nothing to add from this semantic
+            continue
+        idx = numpy.asarray(idx).reshape(len(idx), -1)
+        w = numpy.asarray(w, dtype=numpy.float32).reshape(len(w), -1)
+        # Same as zip(), ignore any components missing from the other array:
+        components = min(idx.shape[1], w.shape[1])
+        indices.append(idx[:, :components])
+        weights.append(w[:, :components])
+    if not indices:
+        return
+    indices = numpy.concatenate(indices, axis=1)
+    weights = numpy.concatenate(weights, axis=1)
+
+    # Flatten to one (vertex, group, weight) entry per pair in the order they
+    # would have been added one at a time, dropping zero weights:
+    vertex = numpy.repeat(numpy.arange(len(indices)), indices.shape[1])
+    group = indices.ravel().astype(numpy.int64)
+    weight = weights.ravel()
+    keep = weight != 0.0
+    vertex, group, weight = vertex[keep], group[keep], weight[keep]
+    if not len(vertex):
+        return
+
+    # A vertex listing the same group more than once keeps the position of the
+    # first add but the weight of the last, as REPLACE overwrites it:
+    key = vertex * (int(group.max()) + 1) + group
+    order = numpy.argsort(key, kind="stable")
+    sorted_key = key[order]
+    starts = numpy.flatnonzero(numpy.r_[True, sorted_key[1:] != sorted_key[:-1]])
+    ends = numpy.r_[starts[1:], len(order)] - 1
+    first, last = order[starts], order[ends]
+    by_position = numpy.argsort(first)
+    first, last = first[by_position], last[by_position]
+    vertex, group, weight = vertex[first], group[first], weight[last]
+
+    # Blender appends groups to each vertex in the order they are first added,
+    # so add everything in rounds: the first group of every vertex, then the
+    # second, and so on. Within a round each vertex occurs at most once, so
+    # vertices sharing a group and weight can all be added together:
+    vertex_starts = numpy.flatnonzero(numpy.r_[True, vertex[1:] != vertex[:-1]])
+    rank = numpy.arange(len(vertex)) - numpy.repeat(
+        vertex_starts, numpy.diff(numpy.r_[vertex_starts, len(vertex)])
+    )
+    order = numpy.lexsort((vertex, weight, group, rank))
+    vertex, group, weight = vertex[order], group[order], weight[order]
+    rank = rank[order]
+    boundaries = numpy.flatnonzero(
+        (rank[1:] != rank[:-1])
+        | (group[1:] != group[:-1])
+        | (weight[1:] != weight[:-1])
+    )
+    starts = numpy.r_[0, boundaries + 1]
+    ends = numpy.r_[boundaries + 1, len(vertex)].tolist()
+    group = group[starts].tolist()
+    weight = weight[starts].tolist()
+    vertex = vertex.tolist()
+    # Looking a vertex group up by index costs more than the add() itself, and
+    # with float weights there is about one add() per pair:
+    add = [vertex_group.add for vertex_group in obj.vertex_groups]
+    for g, w, start, end in zip(group, weight, starts.tolist(), ends):
+        add[g](vertex[start:end], w, "REPLACE")
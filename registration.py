@@ -3,6 +3,7 @@ from .tools.tools_operators import classes as quick_import_classes, menu_func
 from .ui import *
 from .quickimport.operators import *
 from .quickimport.preferences import *
+from .quickimport.modules.data.data_extractor import clear_export_caches
 
 addon_keymaps = []
 
@@ -54,6 +55,9 @@ def register():
     bpy.types.VIEW3D_MT_object.append(menu_func)
     setup_keymaps()
 
+    # Export caches are keyed by mesh name, drop them when another file is loaded
+    bpy.app.handlers.load_post.append(clear_export_caches)
+
     # Load preferences if any
     preferences = load_preferences()
     if preferences:
@@ -75,6 +79,10 @@ def unregister():
     # Remove menus
     bpy.types.TOPBAR_MT_file_import.remove(menu_func_import)
     bpy.types.VIEW3D_MT_object.remove(menu_func)
+
+    # Remove the load handler, so it doesn't outlive the addon
+    if clear_export_caches in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(clear_export_caches)
     
     # Remove properties from scene, with check to prevent errors
     if hasattr(bpy.types.Scene, "xxmi_scripts_settings"):
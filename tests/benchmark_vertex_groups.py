@@ -0,0 +1,94 @@
+"""
+Times add_vertex_group_weights() against adding each vertex's groups one at a
+time, as the importer used to, and checks both produce the same vertex groups.
+Needs Blender, run it with:
+
+    blender --background --factory-startup --python tests/benchmark_vertex_groups.py
+"""
+
+import os
+import sys
+import time
+
+import bpy
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quickimport.modules.vertexgroups import add_vertex_group_weights  # noqa: E402
+
+VERTEX_COUNT = 100000
+GROUP_COUNT = 120
+
+
+def make_object(name):
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(VERTEX_COUNT)
+    obj = bpy.data.objects.new(name, mesh)
+    for i in range(GROUP_COUNT):
+        obj.vertex_groups.new(name=str(i))
+    return obj
+
+
+def add_per_vertex(obj, blend_indices, blend_weights):
+    # The old importer loop, over the Python lists the text parser used to return:
+    for vertex in obj.data.vertices:
+        for indices, weights in zip(blend_indices, blend_weights):
+            for i, w in zip(indices[vertex.index], weights[vertex.index]):
+                if w == 0.0:
+                    continue
+                obj.vertex_groups[i].add((vertex.index,), w, "REPLACE")
+
+
+def vertex_groups(obj):
+    return [[(g.group, g.weight) for g in v.groups] for v in obj.data.vertices]
+
+
+def blend_data(rng, semantics, float_weights):
+    blend_indices, blend_weights = [], []
+    for _ in range(semantics):
+        indices = rng.integers(0, GROUP_COUNT, (VERTEX_COUNT, 4)).astype(numpy.uint8)
+        if float_weights:
+            weights = rng.random((VERTEX_COUNT, 4)).astype(numpy.float32)
+        else:
+            # UNORM8 weights only have 256 distinct values:
+            weights = rng.integers(0, 256, (VERTEX_COUNT, 4)) / numpy.float32(255)
+            weights = weights.astype(numpy.float32)
+        weights[rng.random((VERTEX_COUNT, 4)) < 0.3] = 0
+        blend_indices.append(indices)
+        blend_weights.append(weights)
+    return blend_indices, blend_weights
+
+
+def main():
+    rng = numpy.random.default_rng(0)
+    for semantics, float_weights in ((1, False), (2, False), (1, True)):
+        blend_indices, blend_weights = blend_data(rng, semantics, float_weights)
+
+        old = make_object("per_vertex")
+        old_indices = [x.tolist() for x in blend_indices]
+        old_weights = [x.tolist() for x in blend_weights]
+        start = time.perf_counter()
+        add_per_vertex(old, old_indices, old_weights)
+        old_time = time.perf_counter() - start
+
+        new = make_object("batched")
+        start = time.perf_counter()
+        add_vertex_group_weights(new, blend_indices, blend_weights)
+        new_time = time.perf_counter() - start
+
+        print(
+            "%i vertices, %i blend semantic(s), %s weights: per vertex %.2fs, batched %.2fs, identical: %s"
+            % (
+                VERTEX_COUNT,
+                semantics,
+                "float32" if float_weights else "UNORM8",
+                old_time,
+                new_time,
+                vertex_groups(old) == vertex_groups(new),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import os
+import sys
+import types
+
+# Make the quickimport package importable without installing the addon:
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def stub_module(name, **attrs):
+    """Stands in for a Blender module when running outside of Blender"""
+    try:
+        __import__(name)
+    except ImportError:
+        module = types.ModuleType(name)
+        module.__dict__.update(attrs)
+        sys.modules[name] = module
+
+
+stub_module("mathutils", Matrix=list, Vector=tuple)
@@ -0,0 +1,45 @@
+import io
+
+from quickimport.modules.datastructures import FALogFile
+
+LOG = """analyse_options: 00000001
+000001 IASetVertexBuffers(StartSlot:0, NumBuffers:1, ppVertexBuffers:0x0000001, pStrides:0x1, pOffsets:0x2)
+       0: resource=0x0000000000001030 hash=00007150
+000001 DrawIndexed(IndexCount:3, StartIndexLocation:0, BaseVertexLocation:0)
+000002 DrawIndexed(IndexCount:3, StartIndexLocation:0, BaseVertexLocation:0)
+000003 IASetVertexBuffers(StartSlot:0, NumBuffers:1, ppVertexBuffers:0x0000001, pStrides:0x1, pOffsets:0x2)
+000003 DrawIndexed(IndexCount:3, StartIndexLocation:0, BaseVertexLocation:0)
+"""
+
+BOUND = 0x1030
+UNBOUND = 0x2000
+
+
+def parse_log():
+    return FALogFile(io.StringIO(LOG))
+
+
+def indexed_log():
+    log = parse_log()
+    f = io.BytesIO()
+    log.save_index(f, 1, 2)
+    f.seek(0)
+    return FALogFile.load_index(f, 1, 2)
+
+
+def test_find_resource_uses():
+    for log in (parse_log(), indexed_log()):
+        uses = log.find_resource_uses(BOUND, "vb")
+        assert {(x.draw_call, x.slot_type, x.slot) for x in uses} == {
+            (1, "vb", 0),
+            (2, "vb", 0),
+        }
+        assert log.find_resource_uses(BOUND) == uses
+
+
+def test_find_unbound_resource_uses():
+    for log in (parse_log(), indexed_log(), FALogFile()):
+        assert log.find_resource_uses(UNBOUND) == set()
+        assert log.find_resource_uses(UNBOUND, "vb") == set()
+        # Slot class that was never bound in this frame:
+        assert log.find_resource_uses(BOUND, "so") == set()
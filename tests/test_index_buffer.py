@@ -0,0 +1,100 @@
+import io
+
+import numpy
+import pytest
+
+from quickimport.modules.datastructures import Fatal, IndexBuffer
+
+
+def strip_faces(indices):
+    # Reference strip to list conversion, one face at a time:
+    return [
+        (
+            indices[i - 2],
+            indices[i % 2 and i or i - 1],
+            indices[i % 2 and i - 1 or i],
+        )
+        for i in range(2, len(indices))
+    ]
+
+
+def ib_txt(indices, topology="trianglestrip", per_line=1):
+    lines = [
+        "byte offset: 0",
+        "first index: 0",
+        "index count: %i" % len(indices),
+        "topology: %s" % topology,
+        "format: DXGI_FORMAT_R16_UINT",
+        "",
+    ]
+    for i in range(0, len(indices), per_line):
+        lines.append(" ".join(map(str, indices[i : i + per_line])))
+    return io.StringIO("\n".join(lines) + "\n")
+
+
+def test_expand_strip():
+    indices = list(range(7))
+    ib = IndexBuffer(ib_txt(indices))
+    assert ib.faces.tolist() == [list(x) for x in strip_faces(indices)]
+    # Odd faces have their winding swapped to keep the same orientation:
+    assert ib.faces.tolist()[:2] == [[0, 1, 2], [1, 3, 2]]
+    assert len(ib) == len(indices)
+
+
+def test_expand_strip_degenerate_restart():
+    # Repeated indices join two strips with degenerate faces, which are passed
+    # through and do not reset the winding parity:
+    indices = [0, 1, 2, 3, 3, 4, 4, 5, 6, 7]
+    ib = IndexBuffer(ib_txt(indices))
+    assert ib.faces.tolist() == [list(x) for x in strip_faces(indices)]
+    assert ib.faces.tolist()[3] == [3, 4, 3]
+    assert ib.faces.tolist()[-1] == [5, 7, 6]
+
+
+def test_expand_strip_odd_length_restart():
+    # Restarting after an odd number of faces flips the winding of the second
+    # strip, the same as the GPU does:
+    indices = [0, 1, 2, 2, 5, 5, 6, 7]
+    ib = IndexBuffer(ib_txt(indices))
+    assert ib.faces.tolist() == [list(x) for x in strip_faces(indices)]
+
+
+def test_expand_strip_short():
+    ib = IndexBuffer("DXGI_FORMAT_R16_UINT")
+    ib.topology = "trianglestrip"
+    ib.faces = numpy.array([[0], [1]], numpy.uint16)
+    ib.expand_strips()
+    assert ib.faces.shape == (0, 3)
+
+
+def test_expand_strip_bin(tmp_path):
+    indices = [0, 1, 2, 3, 3, 4, 5]
+    path = tmp_path / "ib.buf"
+    path.write_bytes(numpy.array(indices, numpy.uint16).tobytes())
+    ib = IndexBuffer(ib_txt(indices), load_indices=False)
+    with open(path, "rb") as f:
+        ib.parse_ib_bin(f)
+    assert ib.faces.tolist() == [list(x) for x in strip_faces(indices)]
+    assert ib.index_count == len(indices)
+
+
+def test_triangle_list_lines():
+    ib = IndexBuffer(ib_txt([0, 1, 2, 2, 1, 3], "trianglelist", 3))
+    assert ib.faces.tolist() == [[0, 1, 2], [2, 1, 3]]
+
+
+def test_malformed_line():
+    f = ib_txt([0, 1, 2, 2, 1, 3], "trianglelist", 2)
+    with pytest.raises(Fatal):
+        IndexBuffer(f)
+
+
+def test_merge_into_empty():
+    ib = IndexBuffer("DXGI_FORMAT_R32_UINT")
+    other = IndexBuffer(ib_txt([0, 1, 2, 2, 1, 3], "trianglelist", 3))
+    other.format = ib.format
+    ib.merge(other)
+    assert ib.faces.tolist() == [[0, 1, 2], [2, 1, 3]]
+    ib.merge(other)
+    assert ib.faces.shape == (4, 3)
+    assert ib.index_count == 12
@@ -0,0 +1,38 @@
+import pytest
+
+from quickimport.modules.data.byte_buffer import (
+    AbstractSemantic,
+    BufferLayout,
+    BufferSemantic,
+    NumpyBuffer,
+    Semantic,
+)
+from quickimport.modules.data.dxgi_format import DXGIFormat
+
+
+def make_layout():
+    return BufferLayout(
+        [BufferSemantic(AbstractSemantic(Semantic.Position), DXGIFormat.R32G32B32_FLOAT)]
+    )
+
+
+def test_append_equal_layout():
+    buffer = NumpyBuffer(make_layout(), size=2)
+    other_layout = make_layout()
+    buffer.append(NumpyBuffer(other_layout, size=3))
+    buffer.append(NumpyBuffer(other_layout, size=1))
+    assert len(buffer.data) == 6
+
+
+def test_append_layout_changed_after_match():
+    buffer = NumpyBuffer(make_layout(), size=2)
+    other_layout = make_layout()
+    buffer.append(NumpyBuffer(other_layout, size=3))
+    # The layout matched before, but no longer does once it gains an element:
+    other_layout.add_element(
+        BufferSemantic(AbstractSemantic(Semantic.Normal), DXGIFormat.R32G32B32_FLOAT)
+    )
+    assert not buffer.has_layout(other_layout)
+    with pytest.raises(ValueError, match="Layouts do not match!"):
+        buffer.append(NumpyBuffer(other_layout, size=1))
+    assert len(buffer.data) == 5
@@ -0,0 +1,71 @@
+import io
+
+import numpy
+
+from quickimport.modules.datastructures import IndividualVertexBuffer
+
+HEADER = """\
+byte offset: 0
+first vertex: 0
+vertex count: %i
+stride: 16
+topology: trianglelist
+element[0]:
+  SemanticName: NORMAL
+  SemanticIndex: 0
+  Format: R8G8B8A8_UNORM
+  InputSlot: 0
+  AlignedByteOffset: 0
+  InputSlotClass: per-vertex
+  InstanceDataStepRate: 0
+element[1]:
+  SemanticName: TEXCOORD
+  SemanticIndex: 0
+  Format: R32G32_FLOAT
+  InputSlot: 0
+  AlignedByteOffset: 4
+  InputSlotClass: per-vertex
+  InstanceDataStepRate: 0
+element[2]:
+  SemanticName: BLENDINDICES
+  SemanticIndex: 0
+  Format: R8G8B8A8_UINT
+  InputSlot: 0
+  AlignedByteOffset: 12
+  InputSlotClass: per-vertex
+  InstanceDataStepRate: 0
+
+vertex-data:
+
+"""
+
+
+def vb_txt(normals, texcoords, blend_indices):
+    lines = [HEADER % len(normals)]
+    for i, (normal, texcoord, indices) in enumerate(
+        zip(normals, texcoords, blend_indices)
+    ):
+        lines.append("vb0[%i]+000 NORMAL: %s" % (i, ", ".join(normal)))
+        lines.append("vb0[%i]+004 TEXCOORD: %s" % (i, ", ".join(texcoord)))
+        lines.append("vb0[%i]+012 BLENDINDICES: %s" % (i, ", ".join(indices)))
+        lines.append("")
+    return io.StringIO("\n".join(lines))
+
+
+def test_float_columns_keep_double_precision():
+    rng = numpy.random.default_rng(0)
+    normals = [["%g" % x for x in row] for row in rng.random((500, 4))]
+    texcoords = [["%g" % x for x in row] for row in rng.random((500, 2))]
+    blend_indices = [[str(x) for x in row] for row in rng.integers(0, 256, (500, 4))]
+    vb = IndividualVertexBuffer(0, vb_txt(normals, texcoords, blend_indices))
+
+    assert vb.columns["NORMAL"].dtype == numpy.float64
+    assert vb.columns["TEXCOORD"].dtype == numpy.float64
+    # Bit-identical to parsing each value as a Python float, so anything
+    # computed from them (e.g. x * 2 - 1 or 1 - v) only rounds once:
+    expected = [[float(x) for x in row] for row in normals]
+    assert vb.columns["NORMAL"].tolist() == expected
+    expected = [[float(x) for x in row] for row in texcoords]
+    assert vb.columns["TEXCOORD"].tolist() == expected
+    expected = [[int(x) for x in row] for row in blend_indices]
+    assert vb.columns["BLENDINDICES"].tolist() == expected
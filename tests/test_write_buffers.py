@@ -0,0 +1,123 @@
+import io
+
+import numpy
+import pytest
+
+from quickimport.modules import datastructures
+from quickimport.modules.datastructures import (
+    IndexBuffer,
+    InputLayout,
+    VertexBufferGroup,
+)
+
+# Not a multiple of the small chunk size, so the last chunk is a partial one:
+VERTEX_COUNT = 1000
+FACE_COUNT = 333
+STRIDES = {"0": 28, "1": 12}
+
+
+def layout_element(name, fmt, slot, offset):
+    return {
+        "SemanticName": name,
+        "SemanticIndex": 0,
+        "Format": fmt,
+        "InputSlot": slot,
+        "AlignedByteOffset": offset,
+        "InputSlotClass": "per-vertex",
+        "InstanceDataStepRate": 0,
+    }
+
+
+def make_vb():
+    layout = InputLayout(
+        [
+            layout_element("POSITION", "R32G32B32_FLOAT", 0, 0),
+            # Only given three components, the fourth is left zeroed:
+            layout_element("COLOR", "R8G8B8A8_UNORM", 0, 12),
+            layout_element("NORMAL", "R16G16B16A16_SNORM", 0, 16),
+            layout_element("BLENDINDICES", "R8G8B8A8_UINT", 0, 24),
+            layout_element("TEXCOORD", "R16G16_FLOAT", 1, 0),
+            layout_element("TANGENT", "R16G16B16A16_UNORM", 1, 4),
+        ]
+    )
+    rng = numpy.random.default_rng(0)
+    vb = VertexBufferGroup(layout=layout)
+    vb.vertex_count = VERTEX_COUNT
+    vb.columns["POSITION"] = rng.random((VERTEX_COUNT, 3)) * 20 - 10
+    vb.columns["COLOR"] = rng.random((VERTEX_COUNT, 3))
+    vb.columns["NORMAL"] = rng.random((VERTEX_COUNT, 4)) * 2 - 1
+    vb.columns["BLENDINDICES"] = rng.integers(0, 256, (VERTEX_COUNT, 4))
+    vb.columns["TEXCOORD"] = rng.random((VERTEX_COUNT, 2))
+    vb.columns["TANGENT"] = rng.random((VERTEX_COUNT, 4))
+    return vb
+
+
+def make_ib():
+    ib = IndexBuffer("DXGI_FORMAT_R16_UINT")
+    ib.faces = numpy.arange(FACE_COUNT * 3).reshape(-1, 3) % VERTEX_COUNT
+    return ib
+
+
+@pytest.mark.parametrize("chunk_size", [64, datastructures.WRITE_CHUNK_SIZE])
+def test_write_matches_per_vertex_encode(tmp_path, monkeypatch, chunk_size):
+    monkeypatch.setattr(datastructures, "WRITE_CHUNK_SIZE", chunk_size)
+    vb = make_vb()
+    vb.write(str(tmp_path / "out.vb"), STRIDES)
+    for vbuf_idx, stride in STRIDES.items():
+        expected = b"".join(
+            vb.layout.encode(
+                {s: column[i] for s, column in vb.columns.items()}, vbuf_idx, stride
+            )
+            for i in range(len(vb))
+        )
+        assert (tmp_path / ("out.vb" + vbuf_idx)).read_bytes() == expected
+
+    ib = make_ib()
+    with open(tmp_path / "out.ib", "wb") as f:
+        ib.write(f)
+    expected = b"".join(ib.encoder(face) for face in ib.faces)
+    assert (tmp_path / "out.ib").read_bytes() == expected
+
+
+def test_normalized_encoding():
+    # Pin a few values, as the per-vertex encoder shares its conversion with
+    # the chunked writer. Values are scaled at float32 and rounded half to even:
+    layout = InputLayout(
+        [
+            layout_element("COLOR", "R8G8B8A8_UNORM", 0, 0),
+            layout_element("NORMAL", "R16G16B16A16_SNORM", 0, 4),
+        ]
+    )
+    vertex = {"COLOR": [0.0, 0.5, 1.0, 0.2], "NORMAL": [-1.0, 0.5, 1.0, 0.0]}
+    buf = layout.encode(vertex, "0", 12)
+    assert numpy.frombuffer(buf[:4], numpy.uint8).tolist() == [0, 128, 255, 51]
+    assert numpy.frombuffer(buf[4:], numpy.int16).tolist() == [-32767, 16384, 32767, 0]
+
+
+def test_write_to_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(datastructures, "WRITE_CHUNK_SIZE", 64)
+    ib = make_ib()
+    with open(tmp_path / "out.ib", "wb") as f:
+        ib.write(f)
+    f = io.BytesIO()
+    f.name = "out.ib"
+    ib.write(f)
+    assert f.getvalue() == (tmp_path / "out.ib").read_bytes()
+
+
+class ReadOnlyFile(io.FileIO):
+    writes = 0
+
+    def write(self, b):
+        self.writes += 1
+        return super().write(b)
+
+
+def test_write_error_is_not_retried(tmp_path):
+    (tmp_path / "out.ib").write_bytes(b"")
+    with ReadOnlyFile(tmp_path / "out.ib", "rb") as f:
+        # A real file that can't be written must raise rather than have the
+        # same bytes written again through f.write():
+        with pytest.raises(OSError):
+            datastructures.write_array(f, numpy.arange(16, dtype=numpy.uint32))
+        assert f.writes == 0